@@ -0,0 +1,154 @@
+import re, csv, json, time, asyncio, hashlib
+from pathlib import Path
+
+
+# ======================================================
+# 📦 RESUMABLE BATCH RUNNER (JSONL / CSV MANIFESTS)
+# ======================================================
+# Records ({text, emotion, voice, id?}) are streamed from the manifest one
+# line at a time and pushed through a small bounded queue to `concurrency`
+# workers, so memory does not grow with the manifest. Every finished item is
+# appended to a checkpoint log next to the manifest; on restart, ids already
+# logged as ok are skipped instead of being synthesized again. The log keeps
+# the manifest id; the output file name is a sanitized form of it. Ids must
+# be unique within a manifest: a repeated id is skipped with a warning.
+def iter_manifest(path: Path):
+    seen = set()
+    for line_no, record in _iter_records(path):
+        if record["id"] in seen:
+            print(f"⚠️ Skipping manifest line {line_no}: duplicate id '{record['id']}'")
+            continue
+        seen.add(record["id"])
+        yield record
+
+
+def _iter_records(path: Path):
+    path = Path(path)
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.suffix.lower() == ".csv":
+            rows = csv.DictReader(f)
+            for line_no, row in enumerate(rows, start=2):
+                yield line_no, _normalize(row, line_no)
+        else:
+            for line_no, line in enumerate(f, start=1):
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError as exc:
+                    print(f"⚠️ Skipping manifest line {line_no}: {exc}")
+                    continue
+                if not isinstance(record, dict):
+                    print(f"⚠️ Skipping manifest line {line_no}: expected a JSON object, got {type(record).__name__}")
+                    continue
+                yield line_no, _normalize(record, line_no)
+
+
+def _normalize(record: dict, line_no: int) -> dict:
+    return {
+        "id": str(record.get("id") or f"{line_no:06d}"),
+        "text": record.get("text") or "",
+        "emotion": record.get("emotion") or "neutral",
+        "voice": record.get("voice") or None,
+    }
+
+
+UNSAFE_CHARS = re.compile(r"[^A-Za-z0-9._-]+")
+
+
+def output_name(item_id: str) -> str:
+    # Ids are free text; output files must stay inside out_dir. Ids that are
+    # not already plain file names get a short hash so they cannot collide.
+    name = UNSAFE_CHARS.sub("_", item_id).lstrip(".")[:80]
+    if name == item_id:
+        return name
+    return f"{name or 'item'}-{hashlib.sha256(item_id.encode('utf-8')).hexdigest()[:10]}"
+
+
+def load_checkpoint(path: Path) -> set[str]:
+    done = set()
+    if not path.exists():
+        return done
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue  # torn last line from an interrupted run
+            if entry.get("ok"):
+                done.add(entry["id"])
+    return done
+
+
+class BatchStats:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.done = 0
+        self.skipped = 0
+        self.failed = 0
+        self.bytes = 0
+
+    def summary(self) -> str:
+        elapsed = time.perf_counter() - self.started
+        return (f"📦 Batch: {self.done} done, {self.skipped} skipped (checkpoint), {self.failed} failed, "
+                f"{self.bytes / 1e6:.2f} MB in {elapsed:.1f}s "
+                f"({self.done / elapsed if elapsed else 0:.2f} items/s, "
+                f"{self.bytes / 1e6 / elapsed if elapsed else 0:.2f} MB/s)")
+
+
+async def run_batch(manifest: Path, render, out_dir: Path, ext: str = "mp3", concurrency: int = 4,
+                    checkpoint: Path | None = None) -> BatchStats:
+    # render(record, out_path) -> bytes written; retries are the caller's concern.
+    manifest = Path(manifest)
+    checkpoint = checkpoint or manifest.with_name(manifest.name + ".done.jsonl")
+    out_dir.mkdir(parents=True, exist_ok=True)
+    completed = load_checkpoint(checkpoint)
+    stats = BatchStats()
+    queue = asyncio.Queue(maxsize=2 * max(1, concurrency))
+
+    with open(checkpoint, "a", encoding="utf-8") as log:
+        def record_result(item_id: str, ok: bool, written: int = 0, error: str | None = None):
+            entry = {"id": item_id, "ok": ok, "bytes": written, "at": round(time.time(), 3)}
+            if error:
+                entry["error"] = error
+            log.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            log.flush()
+
+        async def worker():
+            while True:
+                record = await queue.get()
+                if record is None:
+                    return
+                out_path = out_dir / f"{output_name(record['id'])}.{ext}"
+                try:
+                    written = await render(record, out_path)
+                    if written == 0:
+                        raise RuntimeError("no audio returned")
+                except Exception as exc:
+                    stats.failed += 1
+                    print(f"❌ Batch item {record['id']} failed: {exc.__class__.__name__}: {exc}")
+                    record_result(record["id"], False, error=f"{exc.__class__.__name__}: {exc}")
+                else:
+                    stats.done += 1
+                    stats.bytes += written
+                    record_result(record["id"], True, written)
+
+        workers = [asyncio.ensure_future(worker()) for _ in range(max(1, concurrency))]
+        try:
+            for record in iter_manifest(manifest):
+                if record["id"] in completed:
+                    stats.skipped += 1
+                    continue
+                await queue.put(record)
+            for _ in workers:
+                await queue.put(None)
+            await asyncio.gather(*workers)
+        except BaseException:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            raise
+
+    print(stats.summary())
+    return stats
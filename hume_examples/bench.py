@@ -0,0 +1,218 @@
+import os, sys, json, math, time, asyncio, argparse, resource, tempfile, subprocess
+from pathlib import Path
+from contextlib import redirect_stdout
+
+
+# ======================================================
+# 🏁 OFFLINE BENCHMARK SUITE (FAKE STREAMING BACKEND)
+# ======================================================
+# Runs the real synthesis paths of example.py against FakeHumeClient, so the
+# streaming code can be measured without an API key or network access:
+#   single       one emotion, one request per run
+#   all          every emotion preset, fanned out with --concurrency
+#   multi        the full presentation_text as one multi-utterance stream
+#   multi-split  presentation_text as one request per segment, then stitched
+#   batch        a generated manifest of --batch-size records
+#   emoji        microbenchmark of the emoji-run tokenizer (no synthesis):
+#                latency per keystroke over every prefix of a typed message,
+#                MB/s over a chat log of --batch-size x 100 lines
+# Every scenario runs in its own child process (so peak RSS is its own) in a
+# scratch directory, with the cache off and metrics kept in memory. Latency
+# is per upstream request (per tokenize call for emoji); MB/s counts decoded
+# audio bytes (UTF-8 text for emoji).
+SCENARIOS = ("single", "all", "multi", "multi-split", "batch", "emoji")
+EMOJI_SAMPLE = ("Hi everyone 👩‍🎓 thanks for coming. 😊😊 I'm so glad to present today! 😡😡😡 This bug again, "
+                "seriously? 🤔 Maybe it was my fault... 🥳🥳🥳🥳 Fixed it! 😢 Sad it took all night. 👩🏽‍🎓 Anyway, "
+                "questions? 🙈 Please be kind.")
+
+
+def percentile(values: list[float], pct: float) -> float | None:
+    # Nearest-rank percentile; None for an empty sample.
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in KiB on Linux.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def write_manifest(path: Path, size: int, lines: dict[str, str]) -> Path:
+    emotions = list(lines)
+    with open(path, "w", encoding="utf-8") as f:
+        for index in range(size):
+            emotion = emotions[index % len(emotions)]
+            f.write(json.dumps({"id": f"item{index:06d}", "text": lines[emotion], "emotion": emotion}) + "\n")
+    return path
+
+
+async def run_scenario(example, client, name: str, args) -> None:
+    if name == "single":
+        await example.with_retries(
+            lambda: example.synthesize_one(client, example.EMOTION_LINES["neutral"], "neutral", args.ext),
+            "neutral", args.retries)
+    elif name == "all":
+        await example.synthesize_all(client, list(example.EMOTION_PRESETS), None, args.ext, args.concurrency,
+                                     args.retries)
+    elif name == "multi":
+        await example.with_retries(lambda: example.synthesize_multi(client, example.presentation_text, args.ext),
+                                   "multi", args.retries)
+    elif name == "multi-split":
+        await example.synthesize_multi_parallel(client, example.presentation_text, args.ext, args.concurrency,
+                                                args.retries)
+    elif name == "batch":
+        manifest = write_manifest(Path("bench_manifest.jsonl"), args.batch_size, example.EMOTION_LINES)
+        manifest.with_name(manifest.name + ".done.jsonl").unlink(missing_ok=True)
+        await example.synthesize_batch(client, manifest, args.ext, args.concurrency, args.retries)
+    else:
+        raise ValueError(f"unknown scenario '{name}'")
+
+
+def emoji_microbench(args) -> dict:
+    from presets import load_registry
+    from emojis import EmojiTokenizer
+
+    tokenizer = EmojiTokenizer.from_registry(load_registry())
+    clock = time.perf_counter
+    started = clock()
+    latencies = []
+    for _ in range(args.runs):
+        for end in range(1, len(EMOJI_SAMPLE) + 1):
+            prefix = EMOJI_SAMPLE[:end]
+            t0 = clock()
+            tokenizer.segments(prefix)
+            latencies.append(clock() - t0)
+    log = "\n".join(EMOJI_SAMPLE[i % 40:] for i in range(args.batch_size * 100))
+    t0 = clock()
+    for _ in range(args.runs):
+        for line in log.split("\n"):
+            tokenizer.segments(line)
+    bulk = clock() - t0
+    total_bytes = len(log.encode("utf-8")) * args.runs
+    return {
+        "scenario": "emoji", "runs": args.runs, "requests": len(latencies), "errors": 0, "retries": 0,
+        "failed_runs": 0, "p50": percentile(latencies, 50), "p99": percentile(latencies, 99), "ttfc_p50": None,
+        "bytes": total_bytes, "wall_s": clock() - started, "mb_per_s": total_bytes / 1e6 / bulk if bulk else 0.0,
+        "decode_mb_per_s": None, "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def child(args) -> dict:
+    if args.child == "emoji":
+        return emoji_microbench(args)
+    # Import example.py from inside a scratch directory: its OUT_DIR is relative.
+    with tempfile.TemporaryDirectory(prefix="tts_bench_") as scratch:
+        os.chdir(scratch)
+        import example
+        from fake_client import FakeHumeClient
+        from metrics import MetricsRecorder
+
+        example.CACHE = None
+        example.METRICS = MetricsRecorder(keep_records=True)
+        example.RETRY_BASE_DELAY = args.retry_delay
+        client = FakeHumeClient(latency=args.latency, chunk_size=args.chunk_size,
+                                seconds_per_char=args.seconds_per_char, jitter=args.jitter,
+                                error_rate=args.error_rate, seed=args.seed)
+        failures = 0
+        started = time.perf_counter()
+        with open(os.devnull, "w") as quiet, redirect_stdout(quiet):
+            for _ in range(args.runs):
+                try:
+                    asyncio.run(run_scenario(example, client, args.child, args))
+                except Exception:
+                    failures += 1
+        wall = time.perf_counter() - started
+        os.chdir(Path(__file__).resolve().parent)
+
+    records = example.METRICS.records
+    ok = [r for r in records if r.status == "ok"]
+    total_bytes = sum(r.bytes for r in records)
+    decode = sum(r.decode_seconds for r in records)
+    return {
+        "scenario": args.child,
+        "runs": args.runs,
+        "requests": len(records),
+        "errors": len(records) - len(ok),
+        "retries": sum(1 for r in records if r.retries),
+        "failed_runs": failures,
+        "p50": percentile([r.finished for r in ok], 50),
+        "p99": percentile([r.finished for r in ok], 99),
+        "ttfc_p50": percentile([r.first_chunk for r in ok if r.first_chunk is not None], 50),
+        "bytes": total_bytes,
+        "wall_s": wall,
+        "mb_per_s": total_bytes / 1e6 / wall if wall else 0.0,
+        "decode_mb_per_s": total_bytes / 1e6 / decode if decode else None,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def child_argv(args, scenario: str) -> list[str]:
+    argv = [sys.executable, str(Path(__file__).resolve()), "--child", scenario]
+    for name in ("runs", "ext", "concurrency", "retries", "retry_delay", "batch_size", "chunk_size", "latency",
+                 "jitter", "error_rate", "seconds_per_char", "seed"):
+        value = getattr(args, name)
+        if value is not None:
+            argv += [f"--{name.replace('_', '-')}", str(value)]
+    return argv
+
+
+def report(results: list[dict]) -> None:
+    def ms(value):
+        if value is None:
+            return "-"
+        return f"{value * 1000:.1f}" if value >= 0.001 else f"{value * 1000:.4f}"
+
+    print(f"{'scenario':<12} {'reqs':>5} {'p50 ms':>8} {'p99 ms':>8} {'ttfc p50':>9} {'MB/s':>7} "
+          f"{'decode MB/s':>12} {'RSS MB':>7} {'errors':>6} {'retries':>7}")
+    for r in results:
+        decode = "-" if r["decode_mb_per_s"] is None else f"{r['decode_mb_per_s']:.0f}"
+        print(f"{r['scenario']:<12} {r['requests']:>5} {ms(r['p50']):>8} {ms(r['p99']):>8} {ms(r['ttfc_p50']):>9} "
+              f"{r['mb_per_s']:>7.2f} {decode:>12} {r['peak_rss_mb']:>7.1f} {r['errors']:>6} {r['retries']:>7}")
+        if r["failed_runs"]:
+            print(f"⚠️ {r['scenario']}: {r['failed_runs']}/{r['runs']} runs failed")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline TTS streaming benchmark (fake backend, no API key)")
+    parser.add_argument("--scenario", "-s", action="append", choices=SCENARIOS,
+                        help="Scenario to run (repeatable, default: all of them)")
+    parser.add_argument("--runs", type=int, default=3, help="Repetitions of each scenario")
+    parser.add_argument("--ext", default="mp3", choices=["mp3", "wav"])
+    parser.add_argument("--concurrency", "-c", type=int, default=4, help="Concurrency for all, multi-split and batch")
+    parser.add_argument("--retries", type=int, default=3, help="Attempts per request on transient errors")
+    parser.add_argument("--retry-delay", type=float, default=0.01, help="Base retry backoff in seconds")
+    parser.add_argument("--batch-size", type=int, default=200, help="Records in the generated batch manifest")
+    parser.add_argument("--chunk-size", type=int, default=16 * 1024, help="Decoded bytes per fake audio chunk")
+    parser.add_argument("--latency", type=float, default=0.005, help="Fake inter-chunk latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Random ± jitter on the inter-chunk latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of fake requests that fail with a 503")
+    parser.add_argument("--seconds-per-char", type=float, default=0.0,
+                        help="Fake generation time per character before an utterance streams")
+    parser.add_argument("--seed", type=int, default=1234, help="Seed for jitter and injected errors")
+    parser.add_argument("--json", type=Path, default=None, help="Also write the results to this JSON file")
+    parser.add_argument("--child", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(child(args)))
+        return
+
+    results = []
+    for scenario in args.scenario or SCENARIOS:
+        print(f"🏁 {scenario}...", file=sys.stderr)
+        proc = subprocess.run(child_argv(args, scenario), capture_output=True, text=True)
+        if proc.returncode != 0:
+            print(f"❌ {scenario} crashed:\n{proc.stderr}", file=sys.stderr)
+            continue
+        results.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+
+    report(results)
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2), encoding="utf-8")
+        print(f"✅ Results saved: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+import os, json, time, shutil, hashlib, tempfile
+from pathlib import Path
+from contextlib import contextmanager
+
+# mkstemp creates 0600 files; finished files get the usual umask-based mode.
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+FILE_MODE = 0o666 & ~_UMASK
+
+
+@contextmanager
+def atomic_write(path: Path, mode: str = "wb", encoding: str | None = None, keep_empty: bool = True):
+    # Yields a temp file next to `path` that replaces it only once the block
+    # finished cleanly; with keep_empty=False an empty result is discarded
+    # and whatever was at `path` stays in place.
+    path = Path(path)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".part")
+    try:
+        with os.fdopen(fd, mode, encoding=encoding) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        if not keep_empty and os.path.getsize(tmp) == 0:
+            os.unlink(tmp)
+            return
+        os.chmod(tmp, FILE_MODE)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+# ======================================================
+# 💾 CONTENT-ADDRESSED SYNTHESIS CACHE
+# ======================================================
+# Entries live in a flat directory as <sha256>.<ext> plus a <sha256>.json
+# sidecar holding how long the original API call took (multi outputs may
+# also carry a <sha256>.<ext>.idx.json segment index, see segments.py). File mtime is the
+# LRU clock: a hit touches the entry, eviction drops the oldest first.
+# The size of everything in the directory is counted once at startup and
+# then kept up to date as entries are written, so the directory is only
+# scanned again when the budget is exceeded; eviction then goes down to
+# EVICT_TO of the budget so the next few stores do not scan again.
+EVICT_TO = 0.9
+
+
+def _size(path: Path) -> int:
+    try:
+        return path.stat().st_size
+    except FileNotFoundError:
+        return 0
+
+
+class SynthesisCache:
+    def __init__(self, directory: Path, max_bytes: int = 256 * 1024 * 1024):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.bytes_served = 0
+        self.seconds_saved = 0.0
+        self.directory.mkdir(parents=True, exist_ok=True)
+        for stale in self.directory.glob("*.part"):
+            stale.unlink(missing_ok=True)
+        self.total = sum(path.stat().st_size for path in self.directory.iterdir() if path.is_file())
+
+    @staticmethod
+    def key(utterances, voice_name: str, ext: str, version: str = "1") -> str:
+        payload = {
+            "utterances": [u.model_dump(exclude_none=True) for u in utterances],
+            "voice_name": voice_name,
+            "format": ext,
+            "version": version,
+        }
+        blob = json.dumps(payload, sort_keys=True, ensure_ascii=False).encode("utf-8")
+        return hashlib.sha256(blob).hexdigest()
+
+    def _audio_path(self, key: str, ext: str) -> Path:
+        return self.directory / f"{key}.{ext}"
+
+    def _meta_path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    def _index_path(self, key: str, ext: str) -> Path:
+        return self.directory / f"{key}.{ext}.idx.json"
+
+    def entry(self, key: str, ext: str) -> Path | None:
+        path = self._audio_path(key, ext)
+        return path if path.exists() else None
+
+    def lookup(self, key: str, ext: str) -> Path | None:
+        path = self._audio_path(key, ext)
+        try:
+            size = path.stat().st_size
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        os.utime(path)
+        self.hits += 1
+        self.bytes_served += size
+        try:
+            self.seconds_saved += json.loads(self._meta_path(key).read_text())["seconds"]
+        except (OSError, ValueError, KeyError):
+            pass
+        return path
+
+    @contextmanager
+    def store(self, key: str, ext: str):
+        # Writes go to a temp file in the cache directory and are only renamed
+        # into place once the stream finished cleanly with at least one byte.
+        audio, meta_path = self._audio_path(key, ext), self._meta_path(key)
+        previous = _size(audio) + _size(meta_path)
+        started = time.perf_counter()
+        with atomic_write(audio, keep_empty=False) as f:
+            yield f
+            empty = f.tell() == 0
+        if empty:
+            return
+        meta = {"seconds": round(time.perf_counter() - started, 3), "created": time.time()}
+        meta_path.write_text(json.dumps(meta))
+        self._grew(_size(audio) + _size(meta_path) - previous, keep=key)
+
+    def add_index(self, key: str, ext: str, source: Path) -> None:
+        # Attaches a segment index (segments.py) to an existing entry.
+        if self.entry(key, ext) is None:
+            return
+        target = self._index_path(key, ext)
+        previous = _size(target)
+        shutil.copyfile(source, target)
+        self._grew(_size(target) - previous, keep=key)
+
+    def _grew(self, size: int, keep: str | None) -> None:
+        self.total += size
+        if self.total > self.max_bytes:
+            self.evict(keep=keep)
+
+    def evict(self, keep: str | None = None):
+        # One scan: every entry's audio, meta and index count toward the budget.
+        entries = []
+        total = 0
+        for path in self.directory.iterdir():
+            if path.suffix == ".part" or not path.is_file():
+                continue
+            size = path.stat().st_size
+            total += size
+            if path.suffix != ".json" and path.stem != keep:
+                entries.append(path)
+        target = self.max_bytes * EVICT_TO
+        if total > self.max_bytes:
+            entries.sort(key=lambda path: path.stat().st_mtime)
+            for path in entries:
+                if total <= target:
+                    break
+                for part in (path, self._meta_path(path.stem), path.with_name(path.name + ".idx.json")):
+                    total -= _size(part)
+                    part.unlink(missing_ok=True)
+        self.total = total
+
+    def summary(self) -> str:
+        return (f"💾 Cache: {self.hits} hits, {self.misses} misses, "
+                f"{self.bytes_served / 1e6:.2f} MB served locally, ~{self.seconds_saved:.1f}s of API time saved")
@@ -0,0 +1,91 @@
+import re, time
+
+
+# ======================================================
+# ✂️ SENTENCE / CLAUSE CHUNKING
+# ======================================================
+# Long segments are cut into utterances of at most `max_chars`, preferring
+# sentence ends, then clause punctuation, then plain whitespace. Each chunk
+# keeps its parent segment's emotion; only the last chunk of a segment gets
+# the segment's trailing_silence so pauses stay where the author put them.
+CHUNK_CHARS = 240
+SENTENCE_END = re.compile(r"(?:(?<=[.!?…！？。])|(?<=[.!?…！？。][\"'”’)\]]))\s+")
+CLAUSE_END = re.compile(r"(?<=[,;:—，；：])\s+")
+WHITESPACE = re.compile(r"\s+")
+TERMINATED = re.compile(r"[.!?…！？。][\"'”’)\]]?\s*$")
+
+
+def split_sentences(text: str) -> list[str]:
+    return [s.strip() for s in SENTENCE_END.split(text) if s.strip()]
+
+
+def _split_long(piece: str, max_chars: int) -> list[str]:
+    if len(piece) <= max_chars:
+        return [piece]
+    out = []
+    for pattern in (CLAUSE_END, WHITESPACE):
+        parts = [p for p in pattern.split(piece) if p]
+        if len(parts) > 1:
+            for part in _pack(parts, max_chars):
+                out.extend(_split_long(part, max_chars) if len(part) > max_chars else [part])
+            return out
+    # A single unbreakable token: hard cut.
+    return [piece[i:i + max_chars] for i in range(0, len(piece), max_chars)]
+
+
+def _pack(pieces: list[str], max_chars: int) -> list[str]:
+    packed = []
+    current = ""
+    for piece in pieces:
+        candidate = f"{current} {piece}" if current else piece
+        if current and len(candidate) > max_chars:
+            packed.append(current)
+            current = piece
+        else:
+            current = candidate
+    if current:
+        packed.append(current)
+    return packed
+
+
+def chunk_text(text: str, max_chars: int = CHUNK_CHARS) -> list[str]:
+    pieces = []
+    for sentence in split_sentences(text):
+        pieces.extend(_split_long(sentence, max_chars))
+    return _pack(pieces, max_chars)
+
+
+def chunk_segments(segments: list[dict], max_chars: int = CHUNK_CHARS) -> list[dict]:
+    chunks = []
+    for index, segment in enumerate(segments):
+        texts = chunk_text(segment["text"], max_chars) or [segment["text"]]
+        for position, text in enumerate(texts):
+            chunk = {"text": text, "emotion": segment["emotion"], "segment": index}
+            if position == len(texts) - 1 and "trailing_silence" in segment:
+                chunk["trailing_silence"] = segment["trailing_silence"]
+            chunks.append(chunk)
+    return chunks
+
+
+# ======================================================
+# ⏱️ PER-SEGMENT TIME-TO-FIRST / LAST BYTE
+# ======================================================
+class SegmentTimings:
+    def __init__(self, chunk_segments: list[int]):
+        self.chunk_segments = chunk_segments
+        self.started = time.perf_counter()
+        self.first: dict[int, float] = {}
+        self.last: dict[int, float] = {}
+
+    def __call__(self, chunk) -> None:
+        now = time.perf_counter() - self.started
+        index = getattr(chunk, "utterance_index", None) or 0
+        segment = self.chunk_segments[min(index, len(self.chunk_segments) - 1)]
+        self.first.setdefault(segment, now)
+        self.last[segment] = now
+
+    def report(self) -> list[dict]:
+        return [
+            {"segment": segment, "ttfb": round(self.first[segment], 3), "ttlb": round(self.last[segment], 3)}
+            for segment in sorted(self.first)
+        ]
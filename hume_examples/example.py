@@ -1,9 +1,24 @@
-import os, base64, asyncio, argparse
-from pathlib import Path
-from dotenv import load_dotenv
+from __future__ import annotations
 
-from hume import AsyncHumeClient
-from hume.tts import PostedUtterance, PostedUtteranceVoiceWithName
+import os, shutil, asyncio, argparse, random
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+# The hume SDK and dotenv are imported where they are first needed, so
+# --help, --list-emotions and --dry-run start without loading them.
+if TYPE_CHECKING:
+    from hume import AsyncHumeClient
+    from hume.tts import PostedUtterance
+
+from presets import PresetError, load_registry
+from cache import SynthesisCache
+from sinks import FileSink, MemorySink, StreamSink, TeeSink, pump
+from stitch import stitch
+from chunker import CHUNK_CHARS, SegmentTimings, chunk_segments
+from segments import SegmentIndex, index_path
+from metrics import MetricsRecorder, current_retry
+from scheduler import (PRIORITY_BACKGROUND, PRIORITY_DEFAULT, PRIORITY_INTERACTIVE, RequestScheduler,
+                       ScheduledClient, TokenBucket, priority)
 
 presentation_text = [
         { "text": "Good afternoon everyone. I’m Shuhan Liu, you can call me Charlotte as well. I’m one of the Challengers in this Hackathon. At the same time, I’m also a participant and fully got involved in our projecta . I’m an exchange student from the University of Waterloo in Canada. As you have seen, I can’t speak, and my right arm and right leg are abnormal.", "emotion": "neutral" },
@@ -25,302 +40,140 @@ VOICE_NAME = "Test Custom Voice"
 OUT_DIR = Path("out_tts")
 OUT_DIR.mkdir(parents=True, exist_ok=True)
 
-# ======================================================
-# ======================================================
-EMOTION_PRESETS = {
-    "neutral": {
-        "description": "neutral, clear, conversational, medium pace, natural emphasis",
-        "speed": 0.95,
-    },
-
-    # ------------------------
-    # ------------------------
-    "angry": {
-        "description": "angry, sharp, intense, clipped consonants, firm emphasis, fast pace",
-        "speed": 0.85,
-    },
-    "angry_2": {
-        "description": "very angry, raised voice, clearly frustrated tone, sharper emphasis, rapid speech with tight phrasing — expressing strong irritation and loss of patience.",
-        "speed": 1.0,
-    },
-    "angry_3": {
-        "description": "furious, loud, explosive tone with extreme tension, clipped words, forceful rhythm, harsh downward inflection — sounds genuinely enraged and emotional.",
-        "speed": 1.15,
-    },
-
-    # ------------------------
-    # ------------------------
-    "happy": {
-        "description": "genuinely happy, bright and energetic, friendly tone with natural laughter in the voice, "
-                       "smiling while speaking, medium-fast rhythm, expressive intonation, and clear articulation. "
-                       "Imagine someone excitedly sharing good news with a close friend.",
-        "speed": 1.07,
-    },
-    "happy_2": {
-        "description": "delighted, lively tone with stronger brightness and dynamic rhythm; smiling through every word, "
-                       "playful and expressive with noticeable warmth and energy that fills the voice.",
-        "speed": 1.12,
-    },
-    "happy_3": {
-        "description": "ecstatic, overjoyed, wide-pitched laughter in the voice, extremely bright tone and quick rhythm, "
-                       "overflowing enthusiasm and genuine excitement — sounds thrilled beyond words.",
-        "speed": 1.22,
-    },
-
-    # ------------------------
-    # ------------------------
-    "enthusiastic_formal": {
-        "description": "enthusiastic but formal, confident projection, clear diction, positive emphasis",
-        "speed": 1.02,
-    },
-    
-    "enthusiastic_formal_2": {
-        "description": "very enthusiastic, expressive intonation and confident rhythm; polished yet dynamic delivery with vibrant projection and upbeat emphasis.",
-        "speed": 1.08,
-    },
-    "enthusiastic_formal_3": {
-        "description": "extremely enthusiastic, passionate yet articulate tone, elevated pitch range, strong rhythm and conviction — sounds inspiring and contagious. Very motivated to get a job",
-        "speed": 1.18,
-    },
-
-    # ------------------------
-    # ------------------------
-    "doubt": {
-        "description": "hesitant, tentative, soft delivery with light pauses and rising intonation; elongated vowels and gentle upward phrasing",
-        "speed": 0.92,
-        "trailing_silence": 0.6,
-    },
-    "funny_sarcastic": {
-        "description": (
-        "playful, lightly mocking tone with exaggerated intonation and slightly slower pacing; "
-        "speech sounds amused but clearly insincere — as if teasing or feigning surprise. "
-        "Example: the word 'wow' is drawn out with dry humor, not genuine admiration."
-    ),
-    "speed": 0.98,
-    "trailing_silence": 0.25,
-    },
-    "anxious": {
-        "description": "rapid, breathy, tense, slight tremor and rising intonation, scattered pacing",
-        "speed": 1.12,
-    },
-    "shy": {
-        "description": "soft, quiet, hesitant, breathy, minimal projection, downward intonation",
-        "speed": 0.9,
-    },
-    "dont_care": {
-        "description": "low-energy, slightly dismissive but weary; soft sighs, short pauses, and a casual, conversational rhythm — minimal affect but humanized with small breaths",
-        "speed": 0.96,
-        "trailing_silence": 0.25,
-    },
-    "admire": {
-        "description": "warm, energetic, elevated pitch on key words, sincere and glowing",
-        "speed": 1.0,
-    },
-    "depressed": {
-        "description": "very low energy, slow tempo, flat affect, soft volume, monotone",
-        "speed": 0.78,
-    },
-    "awe": {
-        "description": (
-            "amazed"
-        ),
-        "speed": 0.88,
-        "trailing_silence": 0.4,
-    },
-
-    "shock": {
-        "description": (
-            "sudden, sharp intake of breath followed by tense, clipped delivery; "
-            "uneven pacing with short bursts of speech, reflecting disbelief or surprise. "
-            "Pitch jumps unpredictably, and tone carries urgency and astonishment. Not sharp nor angry, remarking exclamation points"
-        ),
-        "speed": 0.95,
-        "trailing_silence": 0.2,
-    },
-    "scared":{
-        "description":"slightly scared, uneasy, tense but trying to stay calm; voice trembles subtly, breath a bit shallow, cautious tone",
-        "speed":0.95,
-    },
-    "scared_2":{
-        "description":"scared, voice shaking, breathing faster, urgent tone with rising pitch and nervous hesitations; words slightly rushed",
-        "speed":1.05,
-    },
-    "scared_3":{
-        "description":"terrified, panicked, trembling voice, gasping between words, tone high-pitched and desperate; uneven rhythm, shouting to survive",
-        "speed":1.15,
-    },
-
-    "disgusted": {
-        "description": "slightly disgusted, restrained tone with mild tension in the voice; subtle annoyance, short clipped phrases, quiet exhalation at the end of sentences",
-        "speed": 1.0,
-    },
-    "disgusted_2": {
-        "description": "clearly disgusted, nasal and tense voice; sharper articulation, audible scoffing or sighing between phrases, moderate pitch variation, expressing strong disapproval",
-        "speed": 0.95,
-    },
-    "disgusted_3": {
-        "description": "intensely disgusted, harsh and repelled tone; voice thick with contempt and revulsion, audible recoil, drawn-out vowels and strong emphasis as if physically repulsed",
-        "speed": 0.9,
-    },
-    "sad": {
-        "description": "slightly sad, soft and reflective tone; mild melancholy, gentle downward intonation, calm breathing, steady rhythm, subtle emotional weight",
-        "speed": 0.95,
-    },
-
-    "sad_2": {
-        "description": "sad, emotional voice with audible weight; slower pace, longer pauses, gentle tremble in the tone, subdued emphasis, low energy conveying quiet sorrow",
-        "speed": 0.85,
-    },
-
-    "sad_3": {
-        "description": "deeply sad, grieving tone; voice breaking with emotion, trembling and low-pitched, long pauses, breathy delivery, almost whispering through tears",
-        "speed": 0.75,
-    },
-}
+TTS_VERSION = "1"
+PARTS_DIR = OUT_DIR / ".parts"
+CACHE_DIR = OUT_DIR / ".cache"
+CACHE_MAX_MB = 256
+SHORTCUTS_DIR = OUT_DIR / "shortcuts"
+SERVICE_FORMATS = {"mp3", "wav"}
+SERVICE_CONCURRENCY = 8  # upstream streams for --serve unless --concurrency is given
+SPLIT_CONCURRENCY = 4    # segment requests in flight for --split unless --concurrency is given
+CACHE: SynthesisCache | None = None
+METRICS = MetricsRecorder()
+POSTPROCESSOR = None  # postprocess.PostProcessor when --post is given
+
+RETRY_ATTEMPTS = 3
+RETRY_BASE_DELAY = 0.5  # seconds, doubled on every attempt
 
 # ======================================================
-# 🗣️ SAMPLE LINES — same per emotion (not per level)
+# 🗂️ EMOTION PRESETS & SAMPLE LINES — loaded once from presets.json
 # ======================================================
-EMOTION_LINES = {
-    "neutral": (
-        "Fine, do whatever you want — honestly, it makes no difference to me either way. "
-        "I'll stay out of it; you can make the call and I'll accept the result without fuss."
-    ),
-    "angry": (
-        "I can't believe this happened — this is completely unacceptable and it infuriates me. "
-        "We need to address this immediately, hold people accountable, and make sure it never repeats; "
-        "this kind of behavior is intolerable and I'm demanding action."
-    ),
-    "angry_2": (
-        "I can't believe this happened — this is completely unacceptable and it infuriates me. "
-        "We need to address this immediately, hold people accountable, and make sure it never repeats; "
-        "this kind of behavior is intolerable and I'm demanding action."
-    ),
-    "angry_3": (
-        "I can't believe this happened — this is completely unacceptable and it infuriates me. "
-        "We need to address this immediately, hold people accountable, and make sure it never repeats; "
-        "this kind of behavior is intolerable and I'm demanding action."
-    ),
-    "sad": (
-        "I'm really sorry about this; I've been feeling drained and overwhelmed by what occurred. "
-        "Everything seems muted and heavy, and it's been difficult to find the energy to respond — "
-        "I need a little time to process and recover."
-    ),
-    "sad_2": (
-        "I'm really sorry about this; I've been feeling drained and overwhelmed by what occurred. "
-        "Everything seems muted and heavy, and it's been difficult to find the energy to respond — "
-        "I need a little time to process and recover."
-    ),
-    "sad_3": (
-        "I'm really sorry about this; I've been feeling drained and overwhelmed by what occurred. "
-        "Everything seems muted and heavy, and it's been difficult to find the energy to respond — "
-        "I need a little time to process and recover."
-    ),
-    "doubt": (
-        "Um... I'm not entirely sure this is correct, and I'm feeling hesitant about moving forward. "
-        "Perhaps we should pause, check the details more carefully, and consider alternatives — "
-        "I don't want us to commit to something we might regret."
-    ),
-    "happy": (
-        "That's absolutely wonderful news — I'm genuinely thrilled and full of joy for you. "
-        "This brings a warm, buoyant energy and I feel like celebrating; your success lights up the room."
-    ),
-    "happy_2": (
-        "That's absolutely wonderful news — I'm genuinely thrilled and full of joy for you. "
-        "This brings a warm, buoyant energy and I feel like celebrating; your success lights up the room."
-    ),
-    "happy_3": (
-        "That's absolutely wonderful news — I'm genuinely thrilled and full of joy for you. "
-        "This brings a warm, buoyant energy and I feel like celebrating; your success lights up the room."
-    ),
-    "enthusiastic_formal": (
-        "I'm very pleased to share this opportunity with you; it represents substantial potential and merit. "
-        "Please consider it carefully — I believe it aligns strongly with your skills and the objectives we discussed."
-    ),
-    "enthusiastic_formal_2": (
-        "I'm very pleased to share this opportunity with you; it represents substantial potential and merit. "
-        "Please consider it carefully — I believe it aligns strongly with your skills and the objectives we discussed."
-    ),
-    "enthusiastic_formal_3": (
-        "I'm very pleased to share this opportunity with you; it represents substantial potential and merit. "
-        "Please consider it carefully — I believe it aligns strongly with your skills and the objectives we discussed. I really love this job!"
-    ),
-    "funny_sarcastic": (
-        "Wow Ahmed, you have done a lot in this project, your post is going to reflect your hard work!"
-    ),
-    "anxious": (
-        "I'm feeling a bit on edge and worried about how this will turn out; my thoughts keep racing. "
-        "What if it fails? What if I missed something important? I keep replaying scenarios and hoping for the best."
-    ),
-    "disgusted": (
-        "Ew, that is really off-putting — it makes my skin crawl and I want to step away. "
-        "The sensation is visceral: I recoil, pull back, and feel a strong desire to avoid it entirely."
-    ),
-    "disgusted_2": (
-        "Ew, that is really off-putting — it makes my skin crawl and I want to step away. "
-        "The sensation is visceral: I recoil, pull back, and feel a strong desire to avoid it entirely."
-    ),
-    "disgusted_3": (
-        "Ew, that is really off-putting — it makes my skin crawl and I want to step away. "
-        "The sensation is visceral: I recoil, pull back, and feel a strong desire to avoid it entirely."
-    ),
-    "shy": (
-        "Um... hi — I, uh, just wanted to say hello. I'm a bit nervous and speaking softly because I don't want to impose. "
-        "Please forgive me if I stumble; I'm trying to be polite and quiet while I gather my courage."
-    ),
-    "dont_care": (
-        "Fine, do whatever you want — honestly, it makes no difference to me either way. "
-        "I'll stay out of it; you can make the call and I'll accept the result without fuss."
-    ),
-    "admire": (
-        "Wow — that is truly impressive; I admire the skill and dedication that went into this. "
-        "Your work demonstrates care, talent, and thoughtful execution, and I sincerely respect what you've achieved."
-    ),
-    "depressed": (
-        "Lately I can't seem to find the energy to do much; everything feels heavy and colorless. "
-        "Small tasks that used to be manageable now feel overwhelming, and I'm struggling to motivate myself."
-    ),
-    "awe": ("It’s the most beautiful thing I’ve ever seen — I didn’t even know something like this could exist."),
-    "shock": ("How come? London's airport is only worth 10K, this must be an error for sure! I don't know what happpened."),
-    "scared": ("Oh my god! There is a huge cockroach on the wall! I cannot belive! Please please take it out!"),
-    "scared_2": ("Oh my god! There is a huge cockroach on the wall! I cannot belive! Please please take it out!"),
-    "scared_3": ("Oh my god! There is a huge cockroach on the wall! I cannot belive! Please please take it out!"),
-}
+try:
+    REGISTRY = load_registry()
+except PresetError:
+    REGISTRY = load_registry(user=False)  # main() reports the error
+EMOTION_PRESETS = REGISTRY.presets
+EMOTION_LINES = REGISTRY.lines
 
 # ======================================================
 # 🎧 SYNTHESIS LOGIC
 # ======================================================
-async def synthesize_one(client: AsyncHumeClient, text: str, emotion: str, ext: str = "mp3"):
-    preset = EMOTION_PRESETS[emotion]
-    OUT_DIR.mkdir(parents=True, exist_ok=True)
-    out_path = OUT_DIR / f"{emotion}.{ext}"
+def build_utterance(text: str, emotion: str, trailing_silence: float | None = None,
+                    voice: str | None = None) -> PostedUtterance:
+    from hume.tts import PostedUtterance, PostedUtteranceVoiceWithName
 
+    preset = EMOTION_PRESETS[emotion]
     utterance_kwargs = {
         "text": text,
-        "voice": PostedUtteranceVoiceWithName(name=VOICE_NAME),
+        "voice": PostedUtteranceVoiceWithName(name=voice or VOICE_NAME),
         "description": preset["description"],
         "speed": preset["speed"],
     }
-    if "trailing_silence" in preset:
-        utterance_kwargs["trailing_silence"] = preset["trailing_silence"]
+    if trailing_silence is not None:
+        utterance_kwargs["trailing_silence"] = trailing_silence
+    return PostedUtterance(**utterance_kwargs)
+
+
+def output_format(ext: str):
+    from hume.tts import FormatMp3, FormatWav
+
+    if ext == "wav":
+        return FormatWav()
+    if ext == "mp3":
+        return FormatMp3()
+    return None
+
+
+def metric_tags(utterances: list, ext: str, emotions: list[str] | None = None) -> dict:
+    # emotions: the preset key of each utterance, as the caller chose them; several join with '+'.
+    emotions = dict.fromkeys(emotions or ["custom"])
+    voices = dict.fromkeys(getattr(u.voice, "name", None) or VOICE_NAME for u in utterances)
+    return {
+        "emotion": "+".join(emotions),
+        "voice": "+".join(voices),
+        "text_chars": sum(len(u.text) for u in utterances),
+        "utterances": len(utterances),
+        "ext": ext,
+    }
+
+
+async def synthesize_to_sink(client: AsyncHumeClient, utterances: list, sink, ext: str = "mp3", on_chunk=None,
+                             emotions: list[str] | None = None) -> int:
+    request = {"utterances": utterances, "strip_headers": True, "version": TTS_VERSION}
+    fmt = output_format(ext)
+    if fmt is not None:
+        request["format"] = fmt
+    record = METRICS.start(metric_tags(utterances, ext, emotions)) if METRICS.enabled else None
+    try:
+        stream = client.tts.synthesize_json_streaming(**request)
+        written = await pump(stream, sink, on_chunk=on_chunk, record=record)
+    except BaseException as exc:
+        METRICS.finish(record, error=exc)
+        raise
+    METRICS.finish(record, written)
+    return written
+
+
+async def _write_stream(client: AsyncHumeClient, utterances: list, f, ext: str,
+                        emotions: list[str] | None = None) -> int:
+    return await synthesize_to_sink(client, utterances, StreamSink(f), ext, emotions=emotions)
+
+
+async def stream_to_file(client: AsyncHumeClient, utterances: list, out_path: Path, ext: str = "mp3",
+                         on_chunk=None, emotions: list[str] | None = None) -> int:
+    if CACHE is None:
+        with open(out_path, "wb") as f:
+            return await synthesize_to_sink(client, utterances, StreamSink(f), ext, on_chunk, emotions)
+
+    key = CACHE.key(utterances, VOICE_NAME, ext, TTS_VERSION)
+    cached = CACHE.lookup(key, ext)
+    if cached is None:
+        # One stream, written to the cache entry and the output file by the same writer thread.
+        with CACHE.store(key, ext) as f, open(out_path, "wb") as out:
+            return await synthesize_to_sink(client, utterances, TeeSink(StreamSink(f), StreamSink(out)), ext,
+                                            on_chunk, emotions)
+
+    print(f"💾 Cache hit for {out_path.name}")
+    if METRICS.enabled:
+        record = METRICS.start(metric_tags(utterances, ext, emotions))
+        METRICS.finish(record, cached.stat().st_size, status="cached")
+    await asyncio.to_thread(copy_entry, cached, out_path)
+    return out_path.stat().st_size
+
+
+def copy_entry(cached: Path, out_path: Path) -> None:
+    # Runs in a worker thread: a cached WAV can be tens of MB.
+    if index_path(cached).exists():
+        shutil.copyfile(index_path(cached), index_path(out_path))
+    shutil.copyfile(cached, out_path)
+
+
+async def synthesize_bytes(client: AsyncHumeClient, text: str, emotion: str, ext: str = "mp3") -> bytes:
+    utterance = build_utterance(text, emotion, EMOTION_PRESETS[emotion].get("trailing_silence"))
+    sink = MemorySink()
+    await synthesize_to_sink(client, [utterance], sink, ext, emotions=[emotion])
+    return sink.getvalue()
 
-    utterance = PostedUtterance(**utterance_kwargs)
+
+async def synthesize_one(client: AsyncHumeClient, text: str, emotion: str, ext: str = "mp3"):
+    preset = EMOTION_PRESETS[emotion]
+    OUT_DIR.mkdir(parents=True, exist_ok=True)
+    out_path = OUT_DIR / f"{emotion}.{ext}"
+
+    utterance = build_utterance(text, emotion, preset.get("trailing_silence"))
     print(f"🎙️ Generating '{emotion}' using voice '{VOICE_NAME}'...")
 
-    stream = client.tts.synthesize_json_streaming(
-        utterances=[utterance],
-        strip_headers=True,
-        version="1",
-    )
-
-    written = 0
-    with open(out_path, "wb") as f:
-        async for chunk in stream:
-            audio_b64 = getattr(chunk, "audio", None)
-            if audio_b64:
-                data = base64.b64decode(audio_b64)
-                f.write(data)
-                written += len(data)
+    written = await stream_to_file(client, [utterance], out_path, ext, emotions=[emotion])
 
     if written > 0:
         print(f"✅ Audio saved: {out_path}")
@@ -336,77 +189,634 @@ async def synthesize_multi(client: AsyncHumeClient, segments: list[dict], ext: s
 
     utterances = []
     for segment in segments:
-        preset = EMOTION_PRESETS[segment["emotion"]]
-        utterance_kwargs = {
-            "text": segment["text"],
-            "voice": PostedUtteranceVoiceWithName(name=VOICE_NAME),
-            "description": preset["description"],
-            "speed": preset["speed"],
-        }
-        if "trailing_silence" in segment:
-            utterance_kwargs["trailing_silence"] = segment["trailing_silence"]
-        utterance = PostedUtterance(**utterance_kwargs)
+        utterance = build_utterance(segment["text"], segment["emotion"], segment.get("trailing_silence"))
         utterances.append(utterance)
         print(f"🎙️ Generating '{segment['emotion']}' text '{segment['text']}' using voice '{VOICE_NAME}'...")
 
-    stream = client.tts.synthesize_json_streaming(
-        utterances=utterances,
-        strip_headers=True,
-        version="1",
-    )
-
-    written = 0
-    with open(out_path, "wb") as f:
-        async for chunk in stream:
-            audio_b64 = getattr(chunk, "audio", None)
-            if audio_b64:
-                data = base64.b64decode(audio_b64)
-                f.write(data)
-                written += len(data)
+    # Byte ranges and first/last-byte times per segment are collected as the
+    # stream is consumed (see segments.py), so --chunk-chars can be compared.
+    emotions = [segment["emotion"] for segment in segments]
+    index = SegmentIndex()
+    timings = SegmentTimings(list(range(len(segments))))
+
+    def on_chunk(chunk):
+        timings(chunk)
+        index(chunk)
+
+    index_path(out_path).unlink(missing_ok=True)  # a cache hit restores its own
+    written = await stream_to_file(client, utterances, out_path, ext, on_chunk=on_chunk, emotions=emotions)
+    for row in timings.report():
+        print(f"⏱️ segment {row['segment']}: first byte {row['ttfb']:.3f}s, last byte {row['ttlb']:.3f}s")
 
     if written > 0:
+        if index.ranges:
+            index.finish(out_path, ext, emotions)
+            if CACHE is not None:
+                CACHE.add_index(CACHE.key(utterances, VOICE_NAME, ext, TTS_VERSION), ext, index_path(out_path))
+        if index_path(out_path).exists():
+            print(f"🧭 Segment index saved: {index_path(out_path)}")
+            if POSTPROCESSOR is not None and ext == "wav":
+                postprocess_output(out_path, segments)
         print(f"✅ Audio saved: {out_path}")
     else:
         print(f"⚠️ No audio written. Check voice name or API key.")
 
     return out_path
 
+async def synthesize_progressive(client: AsyncHumeClient, segments: list[dict], ext: str = "mp3",
+                                 max_chars: int = CHUNK_CHARS, sink=None):
+    # Same single stream as synthesize_multi, but long segments are cut into
+    # sentence-sized utterances so the first audio is generated (and written
+    # to the sink) without waiting for a whole paragraph.
+    chunks = chunk_segments(segments, max_chars)
+    utterances = [build_utterance(c["text"], c["emotion"], c.get("trailing_silence")) for c in chunks]
+    timings = SegmentTimings([c["segment"] for c in chunks])
+    index = SegmentIndex([c["segment"] for c in chunks])
+    print(f"✂️ {len(segments)} segments -> {len(chunks)} utterances (max {max_chars} chars)")
+
+    out_path = None
+    if sink is None:
+        OUT_DIR.mkdir(parents=True, exist_ok=True)
+        out_path = OUT_DIR / f"multi.{ext}"
+        index_path(out_path).unlink(missing_ok=True)
+        sink = FileSink(out_path)
+    try:
+        def on_chunk(chunk):
+            timings(chunk)
+            index(chunk)
+        written = await synthesize_to_sink(client, utterances, sink, ext, on_chunk=on_chunk,
+                                           emotions=[c["emotion"] for c in chunks])
+    finally:
+        sink.close()
+    if out_path is not None and written > 0 and index.ranges:
+        index.finish(out_path, ext, [segment["emotion"] for segment in segments])
+        print(f"🧭 Segment index saved: {index_path(out_path)}")
+        if POSTPROCESSOR is not None and ext == "wav":
+            postprocess_output(out_path, segments)
+
+    for row in timings.report():
+        print(f"⏱️ segment {row['segment']}: first byte {row['ttfb']:.3f}s, last byte {row['ttlb']:.3f}s")
+    if written > 0:
+        print(f"✅ Audio saved: {out_path or 'sink'} ({written} bytes)")
+    else:
+        print(f"⚠️ No audio written. Check voice name or API key.")
+    return timings.report()
+
+async def simulate_typing(client: AsyncHumeClient, text: str, emotion: str, ext: str = "mp3",
+                          delay: float = 0.05, concurrency: int = 2):
+    # Feeds word-by-word snapshots of `text` to the incremental engine, the
+    # way the app's sentence-by-sentence "speak while typing" mode would.
+    from incremental import IncrementalSynthesizer
+
+    engine = IncrementalSynthesizer(lambda t, e: synthesize_bytes(client, t, e, ext), concurrency,
+                                    on_audio=lambda s, e, a: print(f"🔊 Ready ({len(a)} bytes): {s[:60]}"))
+    words = text.split(" ")
+    for count in range(1, len(words) + 1):
+        engine.update(" ".join(words[:count]), emotion)
+        await asyncio.sleep(delay)
+    engine.update(text, emotion, final=True)
+    await engine.drain()
+    print(engine.summary())
+
+    PARTS_DIR.mkdir(parents=True, exist_ok=True)
+    parts = []
+    for index, (_, audio) in enumerate(engine.playlist()):
+        if audio:
+            part = PARTS_DIR / f"typed_{index:03d}.{ext}"
+            part.write_bytes(audio)
+            parts.append(part)
+    out_path = OUT_DIR / f"typed.{ext}"
+    if parts:
+        stitch(parts, out_path, ext)
+        for part in parts:
+            part.unlink(missing_ok=True)
+        print(f"✅ Audio saved: {out_path}")
+    return engine
+
+def postprocess_output(out_path: Path, segments: list[dict], parts: list[Path] | None = None) -> int:
+    # --post: loudness, pauses and joins are fixed locally on the WAV, from the
+    # multi output and its segment index or from per-segment parts.
+    from postprocess import indexed_sources, part_sources
+    from segments import load_index, save_index
+
+    pauses = [segment.get("trailing_silence", EMOTION_PRESETS[segment["emotion"]].get("trailing_silence"))
+              for segment in segments]
+    if parts is None:
+        index = load_index(out_path)
+        numbers = [entry["segment"] for entry in index["segments"]]
+        wav, sources = indexed_sources(out_path, index, pauses)
+    else:
+        numbers = list(range(len(parts)))
+        wav, sources = part_sources(parts, pauses)
+    layout = POSTPROCESSOR.process(wav, sources, out_path)
+    save_index(out_path, "wav", [{"segment": number, **entry, "emotion": segments[number]["emotion"]}
+                                 for number, entry in zip(numbers, layout)])
+    print(f"🎚️ Post-processed {out_path}: {len(layout)} segments, {layout[-1]['end'] if layout else 0:.2f}s")
+    return out_path.stat().st_size
+
+
+def extract_segment(segment: int, ext: str = "mp3") -> Path:
+    # Random access into the last multi output through its segment index: no API call, no full decode.
+    from segments import load_index, read_segment
+
+    source = OUT_DIR / f"multi.{ext}"
+    index = load_index(source)
+    entry = next((e for e in index["segments"] if e["segment"] == segment), None)
+    if entry is None:
+        raise KeyError(f"no segment {segment} in {source} ({len(index['segments'])} segments)")
+    out_path = OUT_DIR / f"multi_segment_{segment:03d}.{ext}"
+    out_path.write_bytes(read_segment(source, segment, index))
+    print(f"🧭 Segment {segment} ({entry['start']:.2f}s-{entry['end']:.2f}s, {entry['length']} bytes) -> {out_path}")
+    return out_path
+
+# ======================================================
+# 🔁 RETRIES & CONCURRENT FAN-OUT
+# ======================================================
+def is_transient(exc: BaseException) -> bool:
+    status = getattr(exc, "status_code", None)
+    if status is not None:
+        return status == 429 or status >= 500
+    if isinstance(exc, (asyncio.TimeoutError, ConnectionError)):
+        return True
+    return type(exc).__module__.split(".")[0] in ("httpx", "httpcore")
+
+
+async def with_retries(make_call, label: str, attempts: int = RETRY_ATTEMPTS, base_delay: float | None = None):
+    base_delay = RETRY_BASE_DELAY if base_delay is None else base_delay
+    for attempt in range(1, attempts + 1):
+        token = current_retry.set(attempt - 1)
+        try:
+            return await make_call()
+        except Exception as exc:
+            if attempt >= attempts or not is_transient(exc):
+                raise
+            delay = base_delay * (2 ** (attempt - 1)) * (1 + random.random())
+            print(f"🔁 '{label}' failed ({exc.__class__.__name__}), retry {attempt}/{attempts - 1} in {delay:.2f}s...")
+            await asyncio.sleep(delay)
+        finally:
+            current_retry.reset(token)
+
+
+async def synthesize_all(client: AsyncHumeClient, emotions: list[str], text: str | None = None,
+                         ext: str = "mp3", concurrency: int = 4, attempts: int = RETRY_ATTEMPTS):
+    # One shared client, at most `concurrency` streams in flight; a failed emotion
+    # is reported on its own and never cancels the others.
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def run(emo: str):
+        line = text if text else EMOTION_LINES.get(emo, "")
+        async with semaphore:
+            return await with_retries(lambda: synthesize_one(client, line, emo, ext), emo, attempts)
+
+    results = await asyncio.gather(*(run(emo) for emo in emotions), return_exceptions=True)
+
+    outcome = dict(zip(emotions, results))
+    failures = {emo: res for emo, res in outcome.items() if isinstance(res, BaseException)}
+    for emo, exc in failures.items():
+        print(f"❌ '{emo}' failed: {exc.__class__.__name__}: {exc}")
+    print(f"📊 {len(emotions) - len(failures)}/{len(emotions)} emotions synthesized, {len(failures)} failed.")
+    return outcome
+
+
+async def synthesize_multi_parallel(client: AsyncHumeClient, segments: list[dict], ext: str = "mp3",
+                                    concurrency: int = 4, attempts: int = RETRY_ATTEMPTS):
+    # Every segment is its own request (keeping its own trailing_silence) and is
+    # retried on its own; parts land in PARTS_DIR and are stitched in order.
+    # With the cache on, re-running after a failure only re-requests the
+    # segments that did not make it.
+    PARTS_DIR.mkdir(parents=True, exist_ok=True)
+    out_path = OUT_DIR / f"multi.{ext}"
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def run(index: int, segment: dict) -> Path:
+        utterance = build_utterance(segment["text"], segment["emotion"], segment.get("trailing_silence"))
+        part = PARTS_DIR / f"multi_{index:03d}.{ext}"
+        async with semaphore:
+            print(f"🎙️ Generating segment {index} '{segment['emotion']}' using voice '{VOICE_NAME}'...")
+            written = await with_retries(
+                lambda: stream_to_file(client, [utterance], part, ext, emotions=[segment["emotion"]]),
+                f"segment {index}", attempts)
+        if written == 0:
+            raise RuntimeError(f"no audio returned for segment {index}")
+        return part
+
+    results = await asyncio.gather(*(run(i, seg) for i, seg in enumerate(segments)), return_exceptions=True)
+
+    failures = {i: res for i, res in enumerate(results) if isinstance(res, BaseException)}
+    for index, exc in failures.items():
+        print(f"❌ Segment {index} failed: {exc.__class__.__name__}: {exc}")
+    if failures:
+        raise RuntimeError(f"{len(failures)}/{len(segments)} segments failed, {out_path} not written")
+
+    index_path(out_path).unlink(missing_ok=True)
+    if POSTPROCESSOR is not None and ext == "wav":
+        written = postprocess_output(out_path, segments, results)
+    else:
+        sizes = []
+        written = stitch(results, out_path, ext, sizes)
+        index = SegmentIndex()
+        for number, size in enumerate(sizes):
+            index.add(number, size)
+        index.finish(out_path, ext, [segment["emotion"] for segment in segments])
+        print(f"🧭 Segment index saved: {index_path(out_path)}")
+    for part in results:
+        part.unlink(missing_ok=True)
+    print(f"✅ Audio saved: {out_path} ({len(segments)} segments, {written} audio bytes)")
+    return out_path
+
+async def synthesize_batch(client: AsyncHumeClient, manifest: Path, ext: str = "mp3",
+                           concurrency: int = 4, attempts: int = RETRY_ATTEMPTS):
+    from batch import run_batch
+
+    async def render(record: dict, out_path: Path) -> int:
+        emotion = record["emotion"]
+        if emotion not in EMOTION_PRESETS:
+            raise KeyError(f"unknown emotion '{emotion}'")
+        utterance = build_utterance(record["text"], emotion, EMOTION_PRESETS[emotion].get("trailing_silence"),
+                                    record["voice"])
+        return await with_retries(lambda: stream_to_file(client, [utterance], out_path, ext, emotions=[emotion]),
+                                  record["id"], attempts)
+
+    return await run_batch(manifest, render, OUT_DIR / "batch" / Path(manifest).stem, ext, concurrency)
+
+# ======================================================
+# 🔥 SHORTCUT PRE-WARMING
+# ======================================================
+def prewarm_emotions(selection: list[str] | None = None, max_level: int | None = None) -> list[str]:
+    # Emotion names expand to their levels (up to max_level); preset keys such as angry_2 are taken as is.
+    selected = []
+    for name in selection or list(REGISTRY.levels):
+        if name in REGISTRY.levels:
+            selected.extend(REGISTRY.levels[name][:max_level] if max_level else REGISTRY.levels[name])
+        elif name in EMOTION_PRESETS:
+            selected.append(name)
+        else:
+            raise KeyError(f"unknown emotion '{name}'")
+    return list(dict.fromkeys(selected))
+
+
+def prewarm_jobs(phrases: list[str], emotions: list[str], ext: str = "mp3"):
+    from prewarm import ShortcutStore
+
+    for emotion in emotions:
+        for phrase in phrases:
+            utterance = build_utterance(phrase, emotion, EMOTION_PRESETS[emotion].get("trailing_silence"))
+            yield {
+                "label": f"'{phrase}' ({emotion})",
+                "slot": ShortcutStore.slot(phrase, emotion, ext),
+                "key": SynthesisCache.key([utterance], VOICE_NAME, ext, TTS_VERSION),
+                "ext": ext,
+                "utterances": [utterance],
+                "emotions": [emotion],
+            }
+
+
+async def prewarm_shortcuts(client: AsyncHumeClient, phrases: list[str], emotions: list[str], ext: str = "mp3",
+                            concurrency: int = 2, attempts: int = RETRY_ATTEMPTS, store=None):
+    # Background priority: a live request on the same scheduler always goes first.
+    from prewarm import ShortcutStore, prewarm
+
+    store = store or ShortcutStore(SHORTCUTS_DIR)
+
+    async def render(job: dict, f) -> int:
+        async def attempt():
+            f.seek(0)
+            f.truncate()
+            return await _write_stream(client, job["utterances"], f, job["ext"], job["emotions"])
+        return await with_retries(attempt, "pre-warm", attempts)
+
+    print(f"🔥 Pre-warming {len(phrases)} phrases x {len(emotions)} presets for voice '{VOICE_NAME}'...")
+    with priority(PRIORITY_BACKGROUND):
+        await prewarm(prewarm_jobs(phrases, emotions, ext), render, store, concurrency)
+    print(store.summary())
+    return store
+
+async def run_service(client: AsyncHumeClient, ext: str = "mp3", host: str = "127.0.0.1", port: int = 5000,
+                      unix: str | None = None, warm=None):
+    # warm: optional coroutine function run in the background (shortcut pre-warming)
+    # while the service is already answering requests.
+    from service import SynthesisService, serve
+    from prewarm import ShortcutStore
+
+    shortcuts = ShortcutStore(SHORTCUTS_DIR)
+
+    def plan(path: str, payload: dict):
+        if not isinstance(payload, dict):
+            raise ValueError("request body must be a JSON object")
+        request_ext = payload.get("ext") or ext
+        if request_ext not in SERVICE_FORMATS:
+            raise ValueError(f"'ext' must be one of {sorted(SERVICE_FORMATS)}")
+        voice = payload.get("voice")
+        if voice is not None and (not isinstance(voice, str) or not voice.strip()):
+            raise ValueError("'voice' must be a non-empty string")
+        if path == "/synthesize":
+            segments = [{"text": payload.get("text"), "emotion": payload.get("emotion") or "neutral"}]
+        else:
+            segments = payload.get("segments")
+            if not isinstance(segments, list) or not segments:
+                raise ValueError("'segments' must be a non-empty list")
+        utterances = []
+        emotions = []
+        for segment in segments:
+            if not isinstance(segment, dict):
+                raise ValueError("every segment must be an object with 'text' and 'emotion'")
+            emotion = segment.get("emotion") or "neutral"
+            if emotion not in EMOTION_PRESETS:
+                raise KeyError(f"unknown emotion '{emotion}'")
+            if not isinstance(segment.get("text"), str) or not segment["text"].strip():
+                raise ValueError("'text' must be a non-empty string")
+            trailing_silence = segment.get("trailing_silence", EMOTION_PRESETS[emotion].get("trailing_silence"))
+            utterances.append(build_utterance(segment["text"], emotion, trailing_silence, voice))
+            emotions.append(emotion)
+        key = SynthesisCache.key(utterances, voice or VOICE_NAME, request_ext, TTS_VERSION)
+        return key, {"utterances": utterances, "emotions": emotions}, request_ext
+
+    async def render(job: dict, request_ext: str, sink) -> int:
+        with priority(PRIORITY_INTERACTIVE):
+            return await synthesize_to_sink(client, job["utterances"], sink, request_ext, emotions=job["emotions"])
+
+    background = asyncio.ensure_future(warm(shortcuts)) if warm is not None else None
+    try:
+        await serve(SynthesisService(plan, render, lambda: EMOTION_PRESETS.keys(), CACHE, shortcuts), host, port, unix)
+    finally:
+        if background is not None:
+            background.cancel()
+
 # ======================================================
 # MAIN EXECUTION
 # ======================================================
+def use_registry(extra_paths: list[str]):
+    global REGISTRY, EMOTION_PRESETS, EMOTION_LINES
+    REGISTRY = load_registry(*extra_paths)
+    EMOTION_PRESETS = REGISTRY.presets
+    EMOTION_LINES = REGISTRY.lines
+
+
+def multi_segments(text: str | None) -> list[dict]:
+    # --multi --text: inline emoji runs pick the emotion (and level) of the text after them.
+    if not text:
+        return presentation_text
+    from emojis import EmojiTokenizer
+    return EmojiTokenizer.from_registry(REGISTRY).segments(text)
+
+
+def list_emotions():
+    symbols = {}
+    for symbol, target in REGISTRY.emoji.items():
+        symbols.setdefault(target, []).append(symbol)
+    for name, keys in REGISTRY.levels.items():
+        levels = ", ".join(f"{key} (speed {EMOTION_PRESETS[key]['speed']})" for key in keys)
+        emoji = " ".join(symbols.get(name, []))
+        print(f"{name:<22} {levels}" + (f"  {emoji}" if emoji else ""))
+    print(f"🗂️ {len(REGISTRY.levels)} emotions, {len(EMOTION_PRESETS)} presets, "
+          f"{len(set(EMOTION_LINES.values()))} distinct sample lines")
+
+
+def planned_jobs(args):
+    # (label, emotion, text) for everything a run with these args would request.
+    if args.prewarm:
+        for emotion in args.prewarm_selection:
+            for phrase in args.shortcut_phrases:
+                yield f"shortcut {emotion}", emotion, phrase
+    elif args.batch:
+        from batch import iter_manifest
+        for record in iter_manifest(args.batch):
+            yield record["id"], record["emotion"], record["text"]
+    elif args.type:
+        from chunker import split_sentences
+        text = args.text if args.text else presentation_text[0]["text"]
+        emotion = "neutral" if args.emotion == "all" else args.emotion
+        for index, sentence in enumerate(split_sentences(text)):
+            yield f"typed {index}", emotion, sentence
+    elif args.multi:
+        for index, segment in enumerate(args.multi_segments):
+            yield f"segment {index}", segment["emotion"], segment["text"]
+    elif args.emotion == "all":
+        for emo in EMOTION_PRESETS:
+            yield emo, emo, args.text if args.text else EMOTION_LINES.get(emo, "")
+    else:
+        yield args.emotion, args.emotion, args.text if args.text else EMOTION_LINES.get(args.emotion, "")
+
+
+def dry_run(args):
+    from scheduler import estimate_audio_seconds
+
+    if args.serve:
+        print(f"🧪 Would serve on {('unix:' + args.unix) if args.unix else f'http://{args.host}:{args.port}'}")
+        return
+    count = 0
+    total = 0.0
+    problems = 0
+    for label, emotion, text in planned_jobs(args):
+        count += 1
+        preset = EMOTION_PRESETS.get(emotion)
+        if preset is None or not text:
+            problems += 1
+            print(f"⚠️ {label}: {'unknown emotion ' + repr(emotion) if preset is None else 'empty text'}")
+            continue
+        seconds = estimate_audio_seconds(text, preset["speed"])
+        total += seconds
+        if count <= 50:
+            print(f"🧪 {label}: '{emotion}', {len(text)} chars, ~{seconds:.1f}s audio")
+    if count > 50:
+        print(f"🧪 ... {count - 50} more")
+    quota = f" (quota {args.audio_quota:.0f}s)" if args.audio_quota is not None else ""
+    print(f"🧪 Dry run: {count} requests, {problems} invalid, ~{total:.1f}s of audio{quota}, voice '{VOICE_NAME}', "
+          f".{args.ext} output. Nothing was sent.")
+    if args.audio_quota is not None and total > args.audio_quota:
+        print("⚠️ Estimated audio exceeds --audio-quota.")
+
+
 async def main():
-    global VOICE_NAME
-    parser = argparse.ArgumentParser(description="Hume TTS multi-level emotions demo")
+    global VOICE_NAME, CACHE, METRICS, POSTPROCESSOR
+    presets_parser = argparse.ArgumentParser(add_help=False)
+    presets_parser.add_argument("--presets", action="append", default=[],
+                                help="Extra presets JSON layered over presets.json (repeatable)")
+    known, _ = presets_parser.parse_known_args()
+    preset_error = None
+    try:
+        use_registry(known.presets)
+    except PresetError as exc:
+        preset_error = exc
+
+    parser = argparse.ArgumentParser(description="Hume TTS multi-level emotions demo", parents=[presets_parser])
     parser.add_argument("--text", "-t", default=None, help="Custom text to synthesize")
     parser.add_argument("--emotion", "-e", default="all", choices=["all"] + list(EMOTION_PRESETS.keys()))
     parser.add_argument("--voice", "-v", default=VOICE_NAME)
     parser.add_argument("--ext", default="mp3", help="Output file format (mp3 or wav)")
-    parser.add_argument("--multi", "-m", default=False, action="store_true", help="Synthesize multiple segments")
+    parser.add_argument("--multi", "-m", default=False, action="store_true",
+                        help="Synthesize multiple segments (presentation_text, or --text split on emoji runs like 😡😡)")
+    parser.add_argument("--split", default=False, action="store_true",
+                        help="With --multi, request segments concurrently and stitch them in order")
+    parser.add_argument("--chunk-chars", type=int, default=0,
+                        help="With --multi, split segments into sentence chunks of at most N chars and stream progressively")
+    parser.add_argument("--segment", type=int, default=None,
+                        help="Extract segment N of the last multi output using its index, without calling the API")
+    parser.add_argument("--post", default=False, action="store_true",
+                        help="With --multi --ext wav, normalize loudness, trim/insert pauses and crossfade locally (numpy)")
+    parser.add_argument("--target-dbfs", type=float, default=None,
+                        help="Loudness target for --post (default: the median segment loudness)")
+    parser.add_argument("--crossfade-ms", type=float, default=10.0, help="Crossfade/fade length at joins for --post")
+    parser.add_argument("--gap", type=float, default=None,
+                        help="Pause after segments whose preset has no trailing_silence, for --post (seconds; "
+                             "default: keep the synthesized silence between them)")
+    parser.add_argument("--serve", default=False, action="store_true",
+                        help="Run a persistent local synthesis service (see service.py for routes)")
+    parser.add_argument("--host", default="127.0.0.1", help="Host for --serve")
+    parser.add_argument("--port", type=int, default=5000, help="Port for --serve")
+    parser.add_argument("--unix", default=None, help="Unix socket path for --serve (instead of host/port)")
+    parser.add_argument("--batch", type=Path, default=None,
+                        help="JSONL/CSV manifest of {id, text, emotion, voice} records to render (resumable)")
+    parser.add_argument("--prewarm", default=False, action="store_true",
+                        help="Pre-render shortcut phrases for the selected emotion levels into the local store "
+                             "(in the background with --serve)")
+    parser.add_argument("--shortcuts", type=Path, default=None,
+                        help="File of shortcut phrases, one per line (default: a few built-in ones)")
+    parser.add_argument("--prewarm-emotions", type=lambda v: [e.strip() for e in v.split(",") if e.strip()],
+                        default=None, help="Comma-separated emotions or preset keys to pre-warm (default: all)")
+    parser.add_argument("--max-level", type=int, default=None, help="Highest level per emotion to pre-warm")
+    parser.add_argument("--type", default=False, action="store_true",
+                        help="Simulate speak-while-typing over --text with incremental sentence re-synthesis")
+    parser.add_argument("--type-delay", type=float, default=0.05, help="Seconds between typed words for --type")
+    parser.add_argument("--concurrency", "-c", type=int, default=None,
+                        help="Max concurrent syntheses (--emotion all, --batch, --prewarm; default 1; "
+                             f"--split: default {SPLIT_CONCURRENCY}). "
+                             f"Also caps upstream streams for --serve (default {SERVICE_CONCURRENCY})")
+    parser.add_argument("--retries", type=int, default=RETRY_ATTEMPTS, help="Attempts per synthesis on transient errors")
+    parser.add_argument("--fake", default=False, action="store_true", help="Use the offline fake client (no API key)")
+    parser.add_argument("--fake-latency", type=float, default=0.05, help="Per-chunk latency of the fake client (seconds)")
+    parser.add_argument("--fake-jitter", type=float, default=0.0, help="Random ± jitter on the fake per-chunk latency")
+    parser.add_argument("--fake-error-rate", type=float, default=0.0,
+                        help="Share of fake requests that fail with a 503 (before or during the stream)")
+    parser.add_argument("--fake-max-streams", type=int, default=None,
+                        help="Fake client answers 429 beyond this many concurrent streams")
+    parser.add_argument("--audio-quota", type=float, default=None,
+                        help="Hard cap on estimated audio seconds requested this run (free plan is ~1800)")
+    parser.add_argument("--audio-rate", type=float, default=0.0,
+                        help="Estimated audio seconds allowed per wall-clock second (0 = unlimited)")
+    parser.add_argument("--audio-burst", type=float, default=120.0, help="Token bucket size in audio seconds")
+    parser.add_argument("--cache-dir", type=Path, default=CACHE_DIR, help="Directory of the synthesis cache")
+    parser.add_argument("--cache-max-mb", type=float, default=CACHE_MAX_MB, help="Cache size budget before LRU eviction")
+    parser.add_argument("--no-cache", default=False, action="store_true", help="Always call the API")
+    parser.add_argument("--metrics-jsonl", type=Path, default=None, help="Append one JSON record per request here")
+    parser.add_argument("--metrics-prom", type=Path, default=None,
+                        help="Write Prometheus text-format metrics here at exit")
+    parser.add_argument("--list-emotions", default=False, action="store_true", help="List emotions and levels, then exit")
+    parser.add_argument("--dry-run", default=False, action="store_true",
+                        help="Validate arguments and show what would be synthesized, without calling the API")
+    if preset_error is not None:
+        parser.error(str(preset_error))
     args = parser.parse_args()
 
-    load_dotenv()
-    api_key = os.getenv("HUME_API_KEY")
-    if not api_key:
-        raise EnvironmentError("Missing HUME_API_KEY in .env")
-
     VOICE_NAME = args.voice
-    client = AsyncHumeClient(api_key=api_key)
-
+    if args.concurrency is None:
+        args.concurrency = SERVICE_CONCURRENCY if args.serve else SPLIT_CONCURRENCY if args.split else 1
+    if args.prewarm:
+        from prewarm import DEFAULT_SHORTCUTS, load_shortcuts
+        args.shortcut_phrases = load_shortcuts(args.shortcuts) if args.shortcuts else DEFAULT_SHORTCUTS
+        try:
+            args.prewarm_selection = prewarm_emotions(args.prewarm_emotions, args.max_level)
+        except KeyError as exc:
+            parser.error(exc.args[0])
+    if args.list_emotions:
+        list_emotions()
+        return
     if args.multi:
-        # Example of switching emotions mid-text
-        segments = [
-            {"text": "Hello there, it's good to see you. ", "emotion": "happy"},
-            {"text": "But honestly, I'm starting to feel uncertain... ", "emotion": "doubt"},
-            {"text": "And now I'm getting really frustrated!", "emotion": "angry"},
-        ]
-        await synthesize_multi(client, presentation_text, args.ext)
-    elif args.emotion == "all":
-        for emo in EMOTION_PRESETS:
-            text = args.text if args.text else EMOTION_LINES.get(emo, "")
-            await synthesize_one(client, text, emo, args.ext)
+        args.multi_segments = multi_segments(args.text)
+        if not args.multi_segments:
+            parser.error("--text has no words to speak besides emoji")
+    if args.dry_run:
+        dry_run(args)
+        return
+    if args.segment is not None:
+        try:
+            extract_segment(args.segment, args.ext)
+        except (KeyError, ValueError) as exc:
+            parser.error(exc.args[0])
+        return
+    if args.post:
+        if args.ext != "wav":
+            parser.error("--post works on 16-bit PCM, use it with --ext wav")
+        from postprocess import PostProcessor
+        try:
+            POSTPROCESSOR = PostProcessor(args.target_dbfs, args.crossfade_ms, default_pause=args.gap)
+        except RuntimeError as exc:
+            parser.error(str(exc))
+    METRICS = MetricsRecorder(args.metrics_jsonl, args.metrics_prom)
+    if not args.no_cache:
+        CACHE = SynthesisCache(args.cache_dir, int(args.cache_max_mb * 1024 * 1024))
+    if args.fake:
+        from fake_client import FakeHumeClient
+        client = FakeHumeClient(latency=args.fake_latency, max_streams=args.fake_max_streams, jitter=args.fake_jitter,
+                                error_rate=args.fake_error_rate)
     else:
-        text = args.text if args.text else EMOTION_LINES.get(args.emotion, "")
-        await synthesize_one(client, text, args.emotion, args.ext)
+        from dotenv import load_dotenv
+        from hume import AsyncHumeClient
+
+        load_dotenv()
+        api_key = os.getenv("HUME_API_KEY")
+        if not api_key:
+            raise EnvironmentError("Missing HUME_API_KEY in .env")
+        if args.serve:
+            # One long-lived pooled HTTP client keeps upstream connections warm between requests.
+            import httpx
+            pool = httpx.AsyncClient(timeout=httpx.Timeout(120.0, connect=10.0),
+                                     limits=httpx.Limits(max_keepalive_connections=16, keepalive_expiry=300.0))
+            client = AsyncHumeClient(api_key=api_key, httpx_client=pool)
+        else:
+            client = AsyncHumeClient(api_key=api_key)
+
+    bucket = TokenBucket(args.audio_rate, args.audio_burst, args.audio_quota)
+    scheduler = RequestScheduler(bucket, max_concurrency=max(2, args.concurrency))
+    client = ScheduledClient(client, scheduler)
+
+    try:
+        if args.serve:
+            warm = None
+            if args.prewarm:
+                # Background pre-warming keeps to two streams so live requests always find a free slot.
+                warm = lambda store: prewarm_shortcuts(client, args.shortcut_phrases, args.prewarm_selection, args.ext,
+                                                       min(2, args.concurrency), args.retries, store)
+            await run_service(client, args.ext, args.host, args.port, args.unix, warm)
+        elif args.prewarm:
+            await prewarm_shortcuts(client, args.shortcut_phrases, args.prewarm_selection, args.ext,
+                                    max(1, args.concurrency), args.retries)
+        elif args.batch:
+            with priority(PRIORITY_BACKGROUND):
+                await synthesize_batch(client, args.batch, args.ext, args.concurrency, args.retries)
+        elif args.type:
+            text = args.text if args.text else presentation_text[0]["text"]
+            emotion = "neutral" if args.emotion == "all" else args.emotion
+            with priority(PRIORITY_INTERACTIVE):
+                await simulate_typing(client, text, emotion, args.ext, args.type_delay, max(2, args.concurrency))
+        elif args.multi:
+            # Example of switching emotions mid-text
+            segments = [
+                {"text": "Hello there, it's good to see you. ", "emotion": "happy"},
+                {"text": "But honestly, I'm starting to feel uncertain... ", "emotion": "doubt"},
+                {"text": "And now I'm getting really frustrated!", "emotion": "angry"},
+            ]
+            with priority(PRIORITY_DEFAULT):
+                if args.split:
+                    await synthesize_multi_parallel(client, args.multi_segments, args.ext, args.concurrency, args.retries)
+                elif args.chunk_chars > 0:
+                    await synthesize_progressive(client, args.multi_segments, args.ext, args.chunk_chars)
+                else:
+                    await synthesize_multi(client, args.multi_segments, args.ext)
+        elif args.emotion == "all":
+            with priority(PRIORITY_BACKGROUND):
+                await synthesize_all(client, list(EMOTION_PRESETS), args.text, args.ext, args.concurrency, args.retries)
+        else:
+            text = args.text if args.text else EMOTION_LINES.get(args.emotion, "")
+            with priority(PRIORITY_INTERACTIVE):
+                await with_retries(lambda: synthesize_one(client, text, args.emotion, args.ext), args.emotion, args.retries)
+    finally:
+        METRICS.close()
+        print(scheduler.summary())
+        if CACHE is not None:
+            print(CACHE.summary())
+        if METRICS.enabled:
+            print(METRICS.summary())
 
 
 if __name__ == "__main__":
@@ -0,0 +1,140 @@
+import math, base64, random, struct, asyncio, hashlib
+from collections import OrderedDict
+from types import SimpleNamespace
+
+
+# ======================================================
+# 🧪 OFFLINE STAND-IN FOR AsyncHumeClient
+# ======================================================
+# Audio length follows the text (~15 characters per second, scaled by the
+# utterance speed). MP3 output is a run of valid MPEG-1 Layer III frame
+# headers with filler payload; WAV output is a streamed RIFF header followed
+# by a 16-bit mono sine tone whose loudness depends on the description.
+CHARS_PER_SECOND = 15
+MP3_FRAME_SECONDS = 1152 / 44100
+MP3_FRAME_HEADER = b"\xff\xfb\x90\x64"  # MPEG-1 Layer III, 128 kbps, 44.1 kHz, no padding
+MP3_FRAME_SIZE = 417
+WAV_SAMPLE_RATE = 48000
+RENDER_CACHE_SIZE = 64
+
+
+def estimate_seconds(text: str, speed: float | None = None) -> float:
+    return max(0.2, len(text) / CHARS_PER_SECOND / (speed or 1.0))
+
+
+def fake_mp3(seconds: float, seed: bytes) -> bytes:
+    payload = (seed * (MP3_FRAME_SIZE // len(seed) + 1))[:MP3_FRAME_SIZE - len(MP3_FRAME_HEADER)]
+    return (MP3_FRAME_HEADER + payload) * max(1, round(seconds / MP3_FRAME_SECONDS))
+
+
+def wav_header(data_size: int = 0xFFFFFFFF, sample_rate: int = WAV_SAMPLE_RATE) -> bytes:
+    riff_size = 0xFFFFFFFF if data_size == 0xFFFFFFFF else 36 + data_size
+    return (b"RIFF" + struct.pack("<I", riff_size) + b"WAVE"
+            + b"fmt " + struct.pack("<IHHIIHH", 16, 1, 1, sample_rate, sample_rate * 2, 2, 16)
+            + b"data" + struct.pack("<I", data_size))
+
+
+def fake_pcm(seconds: float, seed: bytes) -> bytes:
+    amplitude = 2000 + seed[0] * 100
+    step = 2 * math.pi * (180 + seed[1]) / WAV_SAMPLE_RATE
+    one_second = struct.pack(f"<{WAV_SAMPLE_RATE}h", *(int(amplitude * math.sin(step * i)) for i in range(WAV_SAMPLE_RATE)))
+    size = int(seconds * WAV_SAMPLE_RATE) * 2
+    return (one_second * (size // len(one_second) + 1))[:size]
+
+
+# Mirrors hume.core.api_error.ApiError closely enough for retry/overload handling.
+class FakeApiError(Exception):
+    def __init__(self, status_code: int, body=None, headers: dict | None = None):
+        super().__init__(f"status_code: {status_code}, body: {body}")
+        self.status_code = status_code
+        self.body = body
+        self.headers = headers or {}
+
+
+class FakeTTS:
+    def __init__(self, latency: float = 0.05, chunk_size: int = 16 * 1024, seconds_per_char: float = 0.0005,
+                 max_streams: int | None = None, retry_after: float | None = None, jitter: float = 0.0,
+                 error_rate: float = 0.0, seed: int | None = None):
+        self.latency = latency
+        self.chunk_size = chunk_size
+        self.seconds_per_char = seconds_per_char
+        # Server-side limit: more concurrent streams than this get a 429.
+        self.max_streams = max_streams
+        self.retry_after = retry_after
+        # Inter-chunk delay is latency ± jitter; error_rate is the share of
+        # requests that fail with a 503, half before the first chunk and
+        # half part-way through the stream.
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.rate_limited = 0
+        self.failed = 0
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._rendered = OrderedDict()
+
+    def render(self, utterance, fmt: str, with_header: bool) -> bytes:
+        seed = hashlib.sha256(f"{utterance.description}:{utterance.text}".encode("utf-8")).digest()
+        seconds = estimate_seconds(utterance.text, utterance.speed) + (utterance.trailing_silence or 0)
+        if fmt == "wav":
+            return (wav_header() if with_header else b"") + fake_pcm(seconds, seed)
+        return fake_mp3(seconds, seed)
+
+    def encoded_chunks(self, utterance, fmt: str, with_header: bool) -> list[str]:
+        # Server-side work is memoized so benchmarks measure the client, not the fake.
+        key = (fmt, with_header, utterance.description, utterance.text, utterance.speed, utterance.trailing_silence)
+        chunks = self._rendered.get(key)
+        if chunks is None:
+            audio = self.render(utterance, fmt, with_header)
+            chunks = [base64.b64encode(audio[start:start + self.chunk_size]).decode("ascii")
+                      for start in range(0, len(audio), self.chunk_size)]
+            self._rendered[key] = chunks
+            if len(self._rendered) > RENDER_CACHE_SIZE:
+                self._rendered.popitem(last=False)
+        else:
+            self._rendered.move_to_end(key)
+        return chunks
+
+    def _delay(self) -> float:
+        if not self.jitter:
+            return self.latency
+        return max(0.0, self.latency + self.random.uniform(-self.jitter, self.jitter))
+
+    async def synthesize_json_streaming(self, utterances, format=None, strip_headers=False, **kwargs):
+        fmt = getattr(format, "type", None) or "mp3"
+        self.calls += 1
+        if self.max_streams is not None and self.in_flight >= self.max_streams:
+            self.rate_limited += 1
+            headers = {"retry-after": str(self.retry_after)} if self.retry_after is not None else {}
+            raise FakeApiError(429, {"message": "Too many concurrent requests"}, headers)
+        fail_after = None
+        if self.error_rate and self.random.random() < self.error_rate:
+            fail_after = 0 if self.random.random() < 0.5 else self.random.randint(1, 8)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        sent = 0
+        try:
+            for index, utterance in enumerate(utterances):
+                chunks = self.encoded_chunks(utterance, fmt, with_header=index == 0 or not strip_headers)
+                # The service has to generate an utterance before streaming it back.
+                await asyncio.sleep(len(utterance.text) * self.seconds_per_char)
+                for chunk_index, audio_b64 in enumerate(chunks):
+                    if fail_after is not None and sent >= fail_after:
+                        self.failed += 1
+                        raise FakeApiError(503, {"message": "Service temporarily unavailable"})
+                    await asyncio.sleep(self._delay())
+                    sent += 1
+                    yield SimpleNamespace(
+                        audio=audio_b64,
+                        utterance_index=index,
+                        chunk_index=chunk_index,
+                        is_last_chunk=chunk_index == len(chunks) - 1,
+                    )
+        finally:
+            self.in_flight -= 1
+
+
+class FakeHumeClient:
+    def __init__(self, **options):
+        self.tts = FakeTTS(**options)
@@ -0,0 +1,90 @@
+import asyncio
+
+from chunker import TERMINATED, split_sentences
+
+
+# ======================================================
+# ⌨️ INCREMENTAL "SPEAK WHILE TYPING" ENGINE
+# ======================================================
+# Each snapshot of the text buffer is split into sentences and diffed by
+# (emotion, sentence) key against what is already synthesized or in flight:
+#   - unchanged sentences reuse their audio,
+#   - new or edited sentences get one request each,
+#   - in-flight requests for sentences that vanished from the buffer are cancelled.
+# A trailing fragment without end punctuation is still being typed and is
+# only spoken once the caller passes final=True (the Enter key in the app).
+class IncrementalSynthesizer:
+    def __init__(self, synthesize, concurrency: int = 2, keep_unused: int = 64, on_audio=None):
+        # synthesize(text, emotion) -> bytes
+        self.synthesize = synthesize
+        self.semaphore = asyncio.Semaphore(max(1, concurrency))
+        self.keep_unused = keep_unused
+        self.on_audio = on_audio
+        self.audio: dict[tuple[str, str], bytes] = {}
+        self.tasks: dict[tuple[str, str], asyncio.Task] = {}
+        self.current: list[tuple[str, str]] = []
+        self.requests = 0
+        self.reused = 0
+        self.cancelled = 0
+
+    @staticmethod
+    def sentences(text: str, final: bool = False) -> list[str]:
+        sentences = split_sentences(text)
+        if sentences and not final and not TERMINATED.search(text):
+            sentences.pop()
+        return sentences
+
+    async def _run(self, key: tuple[str, str]) -> None:
+        emotion, sentence = key
+        async with self.semaphore:
+            self.requests += 1
+            audio = await self.synthesize(sentence, emotion)
+        self.audio[key] = audio
+        if self.on_audio is not None:
+            self.on_audio(sentence, emotion, audio)
+
+    def update(self, text: str, emotion: str = "neutral", final: bool = False) -> list[tuple[str, str]]:
+        wanted = [(emotion, sentence) for sentence in self.sentences(text, final)]
+        wanted_keys = set(wanted)
+
+        for key, task in list(self.tasks.items()):
+            if key not in wanted_keys and not task.done():
+                task.cancel()
+                self.cancelled += 1
+                del self.tasks[key]
+
+        previous = set(self.current)
+        for key in wanted:
+            if key in self.audio or key in self.tasks:
+                if key not in previous and key in self.audio:
+                    self.reused += 1
+                continue
+            task = asyncio.ensure_future(self._run(key))
+            task.add_done_callback(lambda t, key=key: self._finished(key, t))
+            self.tasks[key] = task
+
+        self.current = wanted
+        self._prune(wanted_keys)
+        return wanted
+
+    def _finished(self, key: tuple[str, str], task: asyncio.Task) -> None:
+        if self.tasks.get(key) is task:
+            del self.tasks[key]
+        if not task.cancelled() and task.exception() is not None:
+            print(f"❌ Sentence failed ({key[0]}): {task.exception()}")
+
+    def _prune(self, wanted_keys: set) -> None:
+        unused = [key for key in self.audio if key not in wanted_keys]
+        for key in unused[:max(0, len(unused) - self.keep_unused)]:
+            del self.audio[key]
+
+    async def drain(self) -> None:
+        while self.tasks:
+            await asyncio.gather(*self.tasks.values(), return_exceptions=True)
+
+    def playlist(self) -> list[tuple[str, bytes | None]]:
+        return [(sentence, self.audio.get((emotion, sentence))) for emotion, sentence in self.current]
+
+    def summary(self) -> str:
+        return (f"⌨️ {len(self.current)} sentences, {self.requests} requests, "
+                f"{self.reused} reused, {self.cancelled} cancelled")
@@ -0,0 +1,189 @@
+import json, time
+from contextvars import ContextVar
+
+
+# ======================================================
+# 📈 PER-REQUEST LATENCY / THROUGHPUT INSTRUMENTATION
+# ======================================================
+# One SynthesisRecord per upstream request (every retry attempt is its own
+# record, tagged with how many attempts came before it). Timings are
+# perf_counter offsets from the request start. When the recorder is
+# disabled start() returns None and every hook is a single `is None` check.
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+current_retry: ContextVar[int] = ContextVar("tts_retry", default=0)
+
+
+class SynthesisRecord:
+    __slots__ = ("started_at", "t0", "first_chunk", "last_chunk", "finished", "chunks", "bytes",
+                 "decode_seconds", "write_seconds", "retries", "status", "error", "tags")
+
+    def __init__(self, tags: dict):
+        self.started_at = time.time()
+        self.t0 = time.perf_counter()
+        self.first_chunk = None
+        self.last_chunk = None
+        self.finished = None
+        self.chunks = 0
+        self.bytes = 0
+        self.decode_seconds = 0.0
+        self.write_seconds = 0.0
+        self.retries = current_retry.get()
+        self.status = "pending"
+        self.error = None
+        self.tags = tags
+
+    def on_chunk(self) -> None:
+        now = time.perf_counter() - self.t0
+        if self.first_chunk is None:
+            self.first_chunk = now
+        self.last_chunk = now
+        self.chunks += 1
+
+    def as_dict(self) -> dict:
+        def r(value):
+            return None if value is None else round(value, 6)
+
+        return {
+            "started_at": round(self.started_at, 6),
+            "status": self.status,
+            "error": self.error,
+            "ttfc": r(self.first_chunk),
+            "ttlc": r(self.last_chunk),
+            "total": r(self.finished),
+            "chunks": self.chunks,
+            "bytes": self.bytes,
+            "decode_s": r(self.decode_seconds),
+            "write_s": r(self.write_seconds),
+            "retries": self.retries,
+            **self.tags,
+        }
+
+
+class _Histogram:
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self):
+        self.counts = [0] * len(LATENCY_BUCKETS)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if value <= bound:
+                self.counts[i] += 1
+        self.sum += value
+        self.count += 1
+
+
+class MetricsRecorder:
+    def __init__(self, jsonl_path=None, prom_path=None, keep_records: bool = False):
+        self.jsonl_path = jsonl_path
+        self.prom_path = prom_path
+        self.enabled = bool(jsonl_path or prom_path or keep_records)
+        # Finished records kept in memory (for the benchmark harness).
+        self.records: list[SynthesisRecord] | None = [] if keep_records else None
+        self._jsonl = open(jsonl_path, "a", encoding="utf-8") if jsonl_path else None
+        self._series: dict[tuple, dict] = {}
+        # Cache hits never reach the API, so they are counted apart from the upstream series.
+        self._cached: dict[tuple, dict] = {}
+
+    def start(self, tags: dict) -> SynthesisRecord | None:
+        return SynthesisRecord(tags) if self.enabled else None
+
+    def finish(self, record: SynthesisRecord | None, written: int = 0, error: BaseException | None = None,
+               status: str | None = None) -> None:
+        if record is None:
+            return
+        record.finished = time.perf_counter() - record.t0
+        record.bytes = written or record.bytes
+        record.status = status or ("error" if error is not None else "ok")
+        if error is not None:
+            record.error = f"{error.__class__.__name__}: {error}"[:300]
+        self._aggregate(record)
+        if self.records is not None:
+            self.records.append(record)
+        if self._jsonl is not None:
+            self._jsonl.write(json.dumps(record.as_dict(), ensure_ascii=False) + "\n")
+            self._jsonl.flush()
+
+    def _aggregate(self, record: SynthesisRecord) -> None:
+        if record.status == "cached":
+            labels = (record.tags.get("emotion", ""), record.tags.get("voice", ""))
+            cached = self._cached.setdefault(labels, {"hits": 0, "bytes": 0})
+            cached["hits"] += 1
+            cached["bytes"] += record.bytes
+            return
+        labels = (record.tags.get("emotion", ""), record.tags.get("voice", ""), record.status)
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = {
+                "requests": 0, "bytes": 0, "chunks": 0, "retries": 0, "decode": 0.0, "write": 0.0,
+                "ttfc": _Histogram(), "ttlc": _Histogram(),
+            }
+        series["requests"] += 1
+        series["bytes"] += record.bytes
+        series["chunks"] += record.chunks
+        series["retries"] += record.retries
+        series["decode"] += record.decode_seconds
+        series["write"] += record.write_seconds
+        if record.first_chunk is not None:
+            series["ttfc"].observe(record.first_chunk)
+            series["ttlc"].observe(record.last_chunk)
+
+    def prometheus(self) -> str:
+        def fmt(labels: tuple) -> str:
+            # (emotion, voice, status) for upstream series, (emotion, voice) for cache hits
+            values = [str(v).replace("\\", "\\\\").replace('"', '\\"') for v in labels]
+            return ",".join(f'{name}="{value}"' for name, value in zip(("emotion", "voice", "status"), values))
+
+        out = []
+        counters = [
+            ("tts_requests_total", "requests", "Upstream synthesis requests"),
+            ("tts_audio_bytes_total", "bytes", "Decoded audio bytes received from upstream requests"),
+            ("tts_chunks_total", "chunks", "Audio chunks received"),
+            ("tts_retries_total", "retries", "Attempts that were retries of an earlier failure"),
+            ("tts_decode_seconds_total", "decode", "Time spent base64-decoding audio"),
+            ("tts_write_seconds_total", "write", "Time spent writing audio to sinks"),
+        ]
+        for name, field, help_text in counters:
+            out.append(f"# HELP {name} {help_text}")
+            out.append(f"# TYPE {name} counter")
+            for labels, series in self._series.items():
+                out.append(f"{name}{{{fmt(labels)}}} {series[field]}")
+        for name, field, help_text in (("tts_cache_hits_total", "hits", "Requests served from the local cache"),
+                                       ("tts_cache_bytes_total", "bytes", "Audio bytes served from the local cache")):
+            out.append(f"# HELP {name} {help_text}")
+            out.append(f"# TYPE {name} counter")
+            for labels, cached in self._cached.items():
+                out.append(f"{name}{{{fmt(labels)}}} {cached[field]}")
+        for name, field, help_text in (("tts_time_to_first_chunk_seconds", "ttfc", "Request start to first audio chunk"),
+                                       ("tts_time_to_last_chunk_seconds", "ttlc", "Request start to last audio chunk")):
+            out.append(f"# HELP {name} {help_text}")
+            out.append(f"# TYPE {name} histogram")
+            for labels, series in self._series.items():
+                hist = series[field]
+                for bound, count in zip(LATENCY_BUCKETS, hist.counts):
+                    out.append(f'{name}_bucket{{{fmt(labels)},le="{bound}"}} {count}')
+                out.append(f'{name}_bucket{{{fmt(labels)},le="+Inf"}} {hist.count}')
+                out.append(f"{name}_sum{{{fmt(labels)}}} {hist.sum:.6f}")
+                out.append(f"{name}_count{{{fmt(labels)}}} {hist.count}")
+        return "\n".join(out) + "\n"
+
+    def close(self) -> None:
+        if self._jsonl is not None:
+            self._jsonl.close()
+            self._jsonl = None
+        if self.prom_path:
+            with open(self.prom_path, "w", encoding="utf-8") as f:
+                f.write(self.prometheus())
+
+    def summary(self) -> str:
+        requests = sum(s["requests"] for s in self._series.values())
+        ttfc = [s["ttfc"] for s in self._series.values()]
+        count = sum(h.count for h in ttfc)
+        mean = sum(h.sum for h in ttfc) / count if count else 0.0
+        targets = ", ".join(str(p) for p in (self.jsonl_path, self.prom_path) if p)
+        hits = sum(c["hits"] for c in self._cached.values())
+        return (f"📈 Metrics: {requests} upstream records, {hits} cache hits, "
+                f"mean time to first chunk {mean:.3f}s -> {targets}")
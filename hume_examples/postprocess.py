@@ -0,0 +1,239 @@
+import math, struct
+from pathlib import Path
+from typing import NamedTuple
+
+try:
+    import numpy as np
+except ImportError:  # optional: only --post needs it
+    np = None
+
+from cache import atomic_write
+from stitch import wav_layout
+
+
+# ======================================================
+# 🎚️ BLOCKWISE WAV POST-PROCESSING (OPTIONAL, NUMPY)
+# ======================================================
+# Runs locally on already-synthesized 16-bit PCM, so retuning levels or
+# pauses never costs another API call. Two streaming passes over each
+# segment, one block (~1.3 s) at a time, so memory does not grow with the
+# length of the presentation:
+#   1. analysis: gated loudness (RMS of the 10 ms windows above the
+#      silence threshold), peak, and where speech starts and stops,
+#   2. render: trim silence (keeping a small margin) wherever a pause
+#      replaces it, apply one gain per segment so all segments meet a
+#      common loudness (the median, or target_dbfs) without clipping, then
+#      join segments either with the segment's pause (trailing_silence, or
+#      the default pause) and short fades, or, without a pause, with an
+#      equal-power crossfade. A segment without any pause keeps the
+#      synthesized silence after it (and before the next segment).
+SILENCE_DB = -50.0        # window RMS below this (dBFS) counts as silence
+TRIM_MARGIN = 0.02        # seconds of silence kept around trimmed speech
+CROSSFADE_MS = 10.0
+PEAK_CEILING = 0.98       # max sample magnitude after gain (full scale = 1.0)
+BLOCK_WINDOWS = 128       # 10 ms analysis windows per processing block
+
+
+class Source(NamedTuple):
+    path: Path
+    offset: int            # first byte of this segment's PCM data
+    length: int            # bytes of PCM data
+    pause: float | None    # seconds of silence after the segment (None: the processor's default)
+
+
+class WavFormat(NamedTuple):
+    fmt: bytes
+    channels: int
+    rate: int
+
+    @property
+    def frame_bytes(self) -> int:
+        return 2 * self.channels
+
+
+def parse_format(fmt: bytes) -> WavFormat:
+    audio_format, channels, rate, _, _, bits = struct.unpack("<HHIIHH", fmt[:16])
+    if audio_format not in (1, 0xFFFE) or bits != 16:
+        raise ValueError(f"post-processing needs 16-bit PCM WAV (got format {audio_format}, {bits} bits)")
+    return WavFormat(fmt, channels, rate)
+
+
+def part_sources(parts: list[Path], pauses: list[float | None]) -> tuple[WavFormat, list[Source]]:
+    # One WAV file per segment (the --split path).
+    sources = []
+    fmt = None
+    for part, pause in zip(parts, pauses):
+        with open(part, "rb") as f:
+            part_fmt, offset, length = wav_layout(f)
+        fmt = fmt or part_fmt
+        if part_fmt[:16] != fmt[:16]:
+            raise ValueError(f"{part} does not share the audio format of the first segment")
+        sources.append(Source(Path(part), offset, length, pause))
+    return parse_format(fmt), sources
+
+
+def indexed_sources(path: Path, index: dict, pauses: list[float | None]) -> tuple[WavFormat, list[Source]]:
+    # Segments of one WAV file, located through its segment index (segments.py);
+    # pauses are looked up by segment number.
+    with open(path, "rb") as f:
+        fmt, data_offset, data_length = wav_layout(f)
+    end = data_offset + data_length
+    sources = []
+    for entry in index["segments"]:
+        start = max(entry["offset"], data_offset)
+        stop = min(entry["offset"] + entry["length"], end)
+        pause = pauses[entry["segment"]] if entry["segment"] < len(pauses) else None
+        sources.append(Source(Path(path), start, max(0, stop - start), pause))
+    return parse_format(fmt), sources
+
+
+class PostProcessor:
+    def __init__(self, target_dbfs: float | None = None, crossfade_ms: float = CROSSFADE_MS,
+                 silence_db: float = SILENCE_DB, default_pause: float | None = None):
+        if np is None:
+            raise RuntimeError("WAV post-processing needs numpy (pip install numpy)")
+        self.target_dbfs = target_dbfs
+        self.crossfade_ms = crossfade_ms
+        self.silence_power = 10 ** (silence_db / 10)
+        self.default_pause = default_pause
+
+    def _blocks(self, f, source: Source, wav: WavFormat, start: int, stop: int, block: int):
+        # Float32 (frames, channels) blocks for frames [start, stop) of a segment.
+        f.seek(source.offset + start * wav.frame_bytes)
+        while start < stop:
+            count = min(block, stop - start)
+            data = f.read(count * wav.frame_bytes)
+            usable = len(data) // wav.frame_bytes
+            if usable == 0:
+                return
+            samples = np.frombuffer(data[:usable * wav.frame_bytes], dtype="<i2").reshape(usable, wav.channels)
+            yield samples.astype(np.float32) / 32768.0
+            start += usable
+
+    def analyze(self, source: Source, wav: WavFormat) -> dict:
+        window = max(1, wav.rate // 100)
+        frames = source.length // wav.frame_bytes
+        first = last = None
+        energy = 0.0
+        loud_frames = 0
+        peak = 0.0
+        position = 0
+        with open(source.path, "rb") as f:
+            for block in self._blocks(f, source, wav, 0, frames, window * BLOCK_WINDOWS):
+                power = np.square(block).mean(axis=1)
+                count = -(-len(power) // window)
+                padded = np.zeros(count * window, dtype=np.float32)
+                padded[:len(power)] = power
+                sizes = np.full(count, window)
+                sizes[-1] = len(power) - (count - 1) * window
+                windows = padded.reshape(count, window).sum(axis=1) / sizes
+                loud = np.flatnonzero(windows > self.silence_power)
+                if loud.size:
+                    if first is None:
+                        first = position + int(loud[0]) * window
+                    last = position + min(len(power), (int(loud[-1]) + 1) * window)
+                    energy += float((windows[loud] * sizes[loud]).sum())
+                    loud_frames += int(sizes[loud].sum())
+                peak = max(peak, float(np.abs(block).max()))
+                position += len(power)
+        return {"frames": position, "first": first, "last": last, "peak": peak,
+                "dbfs": 10 * math.log10(energy / loud_frames) if loud_frames else None}
+
+    def process(self, wav: WavFormat, sources: list[Source], out_path: Path) -> list[dict]:
+        # Writes the joined, processed WAV to out_path (atomically; a source may
+        # be out_path itself) and returns {offset, length, start, end} per segment.
+        analyses = [self.analyze(source, wav) for source in sources]
+        levels = sorted(a["dbfs"] for a in analyses if a["dbfs"] is not None)
+        target = self.target_dbfs if self.target_dbfs is not None else (levels[len(levels) // 2] if levels else 0.0)
+        margin = int(TRIM_MARGIN * wav.rate)
+        fade = max(1, int(self.crossfade_ms / 1000 * wav.rate))
+        block = max(1, wav.rate // 100) * BLOCK_WINDOWS
+        header_size = 12 + 8 + len(wav.fmt) + 8
+
+        out_path = Path(out_path)
+        written = 0          # output frames
+        held = None          # last `fade` frames, kept back for the next join
+        pending_pause = 0    # silence frames owed after `held`
+        layout = []
+
+        def emit(frames) -> None:
+            nonlocal written
+            out.write(np.clip(np.rint(frames * 32768.0), -32768, 32767).astype("<i2").tobytes())
+            written += len(frames)
+
+        def ramp(n: int):
+            t = np.linspace(0.0, 1.0, n, dtype=np.float32)[:, None]
+            return np.sin(t * (np.pi / 2)), np.cos(t * (np.pi / 2))
+
+        with atomic_write(out_path) as out:
+            out.write(b"\0" * header_size)
+            pauses = [self.default_pause if source.pause is None else source.pause for source in sources]
+            for i, (source, analysis) in enumerate(zip(sources, analyses)):
+                pause = pauses[i]
+                gain = 1.0
+                if analysis["dbfs"] is not None:
+                    gain = 10 ** ((target - analysis["dbfs"]) / 20)
+                    if analysis["peak"] > 0:
+                        gain = min(gain, PEAK_CEILING / analysis["peak"])
+                # Silence is only trimmed where a pause takes its place.
+                if analysis["first"] is None:
+                    start, stop = 0, (analysis["frames"] if pause is None else 0)  # all silence
+                else:
+                    start = 0 if i and pauses[i - 1] is None else max(0, analysis["first"] - margin)
+                    stop = analysis["frames"] if pause is None else min(analysis["frames"], analysis["last"] + margin)
+                segment_start = None
+                with open(source.path, "rb") as f:
+                    for frames in self._blocks(f, source, wav, start, stop, block):
+                        frames = frames * np.float32(gain)
+                        if segment_start is None:
+                            # Join with whatever came before this segment.
+                            if held is not None and not pending_pause:
+                                overlap = min(len(held), len(frames))
+                                fade_in, fade_out = ramp(overlap)
+                                emit(held[:len(held) - overlap])
+                                segment_start = written
+                                mixed = held[len(held) - overlap:] * fade_out + frames[:overlap] * fade_in
+                                frames = np.concatenate([mixed, frames[overlap:]])
+                            else:
+                                if held is not None:
+                                    emit(held * ramp(len(held))[1])
+                                if pending_pause:
+                                    emit(np.zeros((pending_pause, wav.channels), dtype=np.float32))
+                                segment_start = written
+                                n = min(fade, len(frames))
+                                frames[:n] *= ramp(n)[0]
+                            held = None
+                        elif held is not None:
+                            frames = np.concatenate([held, frames])
+                        keep = min(fade, len(frames))
+                        emit(frames[:len(frames) - keep])
+                        held = frames[len(frames) - keep:]
+                carried = 0
+                if segment_start is None:
+                    # Nothing kept: the pause still goes after the previous segment.
+                    carried = pending_pause
+                    segment_start = written + (len(held) if held is not None else 0) + pending_pause
+                layout.append(segment_start)
+                pending_pause = carried + int(round((pause or 0.0) * wav.rate))
+            if held is not None:
+                emit(held * ramp(len(held))[1])
+            if pending_pause:
+                emit(np.zeros((pending_pause, wav.channels), dtype=np.float32))
+
+            data_bytes = written * wav.frame_bytes
+            pad = data_bytes & 1
+            if pad:
+                out.write(b"\0")
+            out.seek(0)
+            out.write(b"RIFF" + struct.pack("<I", header_size - 8 + data_bytes + pad) + b"WAVE"
+                      + b"fmt " + struct.pack("<I", len(wav.fmt)) + wav.fmt
+                      + b"data" + struct.pack("<I", data_bytes))
+
+        segments = []
+        bounds = layout + [written]
+        for i in range(len(layout)):
+            offset = 0 if i == 0 else header_size + bounds[i] * wav.frame_bytes
+            end = header_size + bounds[i + 1] * wav.frame_bytes
+            segments.append({"offset": offset, "length": end - offset,
+                             "start": round(bounds[i] / wav.rate, 3), "end": round(bounds[i + 1] / wav.rate, 3)})
+        return segments
@@ -0,0 +1,129 @@
+import os, json
+from pathlib import Path
+from functools import lru_cache
+from typing import NamedTuple
+
+
+# ======================================================
+# 🗂️ EMOTION PRESET REGISTRY (presets.json)
+# ======================================================
+# presets.json holds the built-in emotions:
+#   {"version": 1,
+#    "emoji":    {"<emoji>": "<emotion or preset key>", ...},
+#    "lines":    {"<line id>": "sample text", ...},
+#    "emotions": {"<name>": {"line": "<line id>", "description": ..., "speed": ...,
+#                            "trailing_silence": ...}                       # one level
+#                 "<name>": {"line": "<line id>", "levels": [{...}, {...}]}  # leveled
+#    }}
+# Level 1 of a leveled emotion keeps the bare name, level n becomes <name>_n,
+# and any level may override "line". Sample lines are stored once and shared.
+# User files (HUME_PRESETS, os.pathsep-separated, or --presets) use the same
+# schema and are layered on top: their lines and emotions add to or replace
+# the built-in ones, so new emotions and levels need no code changes. An
+# emoji mapped to null in a user file drops it (see emojis.py for how runs
+# of an emoji pick a level).
+PRESETS_FILE = Path(__file__).with_name("presets.json")
+SUPPORTED_VERSIONS = {1}
+LEVEL_KEYS = {"description", "speed", "trailing_silence", "line"}
+SECTIONS = ("emoji", "lines", "emotions")
+SPEED_RANGE = (0.25, 3.0)
+
+
+class PresetError(ValueError):
+    pass
+
+
+class Registry(NamedTuple):
+    presets: dict[str, dict]
+    lines: dict[str, str]
+    levels: dict[str, list[str]]
+    emoji: dict[str, str]
+
+
+def _read(path: Path) -> dict:
+    try:
+        doc = json.loads(Path(path).read_text(encoding="utf-8"))
+    except (OSError, ValueError) as exc:
+        raise PresetError(f"{path}: cannot load presets ({exc})") from exc
+    if not isinstance(doc, dict) or doc.get("version") not in SUPPORTED_VERSIONS:
+        raise PresetError(f"{path}: unsupported presets version {doc.get('version') if isinstance(doc, dict) else None!r}")
+    for section in SECTIONS:
+        if doc.get(section) is not None and not isinstance(doc[section], dict):
+            raise PresetError(f"{path}: '{section}' must be an object")
+    return doc
+
+
+def _check_level(where: str, level: dict, lines: dict) -> dict:
+    if not isinstance(level, dict):
+        raise PresetError(f"{where}: expected an object")
+    unknown = set(level) - LEVEL_KEYS
+    if unknown:
+        raise PresetError(f"{where}: unknown keys {sorted(unknown)}")
+    if not isinstance(level.get("description"), str) or not level["description"].strip():
+        raise PresetError(f"{where}: 'description' must be a non-empty string")
+    speed = level.get("speed")
+    if not isinstance(speed, (int, float)) or not SPEED_RANGE[0] <= speed <= SPEED_RANGE[1]:
+        raise PresetError(f"{where}: 'speed' must be a number in {SPEED_RANGE}")
+    silence = level.get("trailing_silence")
+    if silence is not None and (not isinstance(silence, (int, float)) or silence < 0):
+        raise PresetError(f"{where}: 'trailing_silence' must be a non-negative number")
+    if "line" in level and level["line"] not in lines:
+        raise PresetError(f"{where}: unknown line '{level['line']}'")
+    return level
+
+
+def build_registry(docs: list[dict]) -> Registry:
+    lines: dict[str, str] = {}
+    emotions: dict[str, dict] = {}
+    emoji: dict[str, str | None] = {}
+    for doc in docs:
+        emoji.update(doc.get("emoji") or {})
+        for line_id, text in (doc.get("lines") or {}).items():
+            if not isinstance(text, str):
+                raise PresetError(f"line '{line_id}': expected a string")
+            lines[line_id] = text
+        emotions.update(doc.get("emotions") or {})
+
+    presets: dict[str, dict] = {}
+    sample_lines: dict[str, str] = {}
+    levels: dict[str, list[str]] = {}
+    for name, entry in emotions.items():
+        if not isinstance(entry, dict):
+            raise PresetError(f"emotion '{name}': expected an object")
+        shared_line = entry.get("line")
+        if shared_line is not None and shared_line not in lines:
+            raise PresetError(f"emotion '{name}': unknown line '{shared_line}'")
+        if "levels" in entry and set(entry) - {"levels", "line"}:
+            raise PresetError(f"emotion '{name}': {sorted(set(entry) - {'levels', 'line'})} must go inside "
+                              f"'levels' when the emotion has levels")
+        raw_levels = entry["levels"] if "levels" in entry else [{k: v for k, v in entry.items() if k != "levels"}]
+        if not isinstance(raw_levels, list) or not raw_levels:
+            raise PresetError(f"emotion '{name}': 'levels' must be a non-empty list")
+        levels[name] = []
+        for number, raw in enumerate(raw_levels, start=1):
+            key = name if number == 1 else f"{name}_{number}"
+            level = _check_level(f"emotion '{key}'", raw, lines)
+            if key in presets:
+                raise PresetError(f"emotion '{key}' is defined twice")
+            presets[key] = {k: level[k] for k in ("description", "speed", "trailing_silence") if k in level}
+            line_id = level.get("line", shared_line)
+            if line_id is not None:
+                sample_lines[key] = lines[line_id]
+            levels[name].append(key)
+    for symbol, target in list(emoji.items()):
+        if target is None:
+            del emoji[symbol]
+        elif not symbol or not isinstance(target, str) or target not in levels and target not in presets:
+            raise PresetError(f"emoji '{symbol}': unknown emotion '{target}'")
+    return Registry(presets, sample_lines, levels, emoji)
+
+
+def user_preset_paths() -> list[str]:
+    return [p for p in os.environ.get("HUME_PRESETS", "").split(os.pathsep) if p]
+
+
+@lru_cache(maxsize=None)
+def load_registry(*extra_paths: str, user: bool = True) -> Registry:
+    # user=False skips HUME_PRESETS (the built-in fallback when those fail to load).
+    paths = [PRESETS_FILE, *(user_preset_paths() if user else []), *extra_paths]
+    return build_registry([_read(path) for path in paths])
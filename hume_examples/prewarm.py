@@ -0,0 +1,128 @@
+import json, time, asyncio
+from pathlib import Path
+from contextlib import contextmanager
+
+from cache import atomic_write
+
+
+# ======================================================
+# 🔥 SHORTCUT PRE-WARMING INTO A LOCAL AUDIO STORE
+# ======================================================
+# Shortcut phrases are rendered ahead of time for every selected emotion
+# level and the current voice. Each slot (phrase, emotion, ext) maps to the
+# request's cache key in index.json, and the audio is stored as <key>.<ext>.
+# The key hashes the full utterance (description, speed, trailing silence,
+# voice), so when a preset or the voice changes the slot turns stale, only
+# that entry is rebuilt and the audio it replaces is deleted; a tap looks
+# its key up and is served from disk. There is no LRU eviction: the store
+# holds one entry per slot, and audio no slot points to is removed on load.
+DEFAULT_SHORTCUTS = [
+    "Excuse me.",
+    "Thank you!",
+    "Yes, please.",
+    "No, thank you.",
+    "Could you repeat that, please?",
+    "Give me a moment to type.",
+]
+INDEX_VERSION = 2  # 1 keyed slots by voice as well
+
+
+def load_shortcuts(path: Path) -> list[str]:
+    # One phrase per line; blank lines and '#' comments are ignored.
+    with open(path, encoding="utf-8") as f:
+        phrases = [line.strip() for line in f]
+    return list(dict.fromkeys(p for p in phrases if p and not p.startswith("#")))
+
+
+class ShortcutStore:
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.index_path = self.directory / "index.json"
+        self.hits = 0
+        for stale in self.directory.glob("*.part"):
+            stale.unlink(missing_ok=True)
+        try:
+            index = json.loads(self.index_path.read_text(encoding="utf-8"))
+            self.entries: dict[str, dict] = index["entries"] if index.get("version") == INDEX_VERSION else {}
+        except (OSError, ValueError, KeyError):
+            self.entries = {}
+        keys = {entry["key"] for entry in self.entries.values()}
+        for path in self.directory.iterdir():
+            if path.is_file() and path != self.index_path and path.stem not in keys:
+                path.unlink(missing_ok=True)  # replaced, or from an older index layout
+
+    @staticmethod
+    def slot(phrase: str, emotion: str, ext: str) -> str:
+        return json.dumps([phrase, emotion, ext], ensure_ascii=False)
+
+    def _audio_path(self, key: str, ext: str) -> Path:
+        return self.directory / f"{key}.{ext}"
+
+    def status(self, slot: str, key: str, ext: str) -> str:
+        entry = self.entries.get(slot)
+        if entry is None or not self._audio_path(entry["key"], ext).exists():
+            return "missing"
+        return "fresh" if entry["key"] == key else "stale"
+
+    def lookup(self, key: str, ext: str) -> Path | None:
+        path = self._audio_path(key, ext)
+        if not path.exists():
+            return None
+        self.hits += 1
+        return path
+
+    def _save_index(self) -> None:
+        with atomic_write(self.index_path, "w", encoding="utf-8") as f:
+            json.dump({"version": INDEX_VERSION, "entries": self.entries}, f, ensure_ascii=False, indent=1)
+
+    @contextmanager
+    def store(self, slot: str, key: str, ext: str):
+        # A failed or empty stream leaves the previous (stale) entry in place.
+        with atomic_write(self._audio_path(key, ext), keep_empty=False) as f:
+            yield f
+            empty = f.tell() == 0
+        if empty:
+            return
+        previous = self.entries.get(slot)
+        self.entries[slot] = {"key": key, "bytes": self._audio_path(key, ext).stat().st_size,
+                              "created": round(time.time(), 3)}
+        if previous is not None and previous["key"] != key:
+            if not any(e["key"] == previous["key"] for e in self.entries.values()):
+                self._audio_path(previous["key"], ext).unlink(missing_ok=True)
+        self._save_index()
+
+    def summary(self) -> str:
+        size = sum(e["bytes"] for e in self.entries.values())
+        return f"🔥 Shortcut store: {len(self.entries)} entries, {size / 1e6:.2f} MB, {self.hits} taps served from disk"
+
+
+async def prewarm(jobs, render, store: ShortcutStore, concurrency: int = 2) -> dict:
+    # jobs: iterable of {"label", "slot", "key", "ext", "utterances", "emotions"}
+    # render(job, f) -> bytes written; retries are the caller's concern.
+    counts = {"fresh": 0, "missing": 0, "stale": 0, "built": 0, "failed": 0}
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def build(job: dict):
+        async with semaphore:
+            try:
+                with store.store(job["slot"], job["key"], job["ext"]) as f:
+                    written = await render(job, f)
+                if written == 0:
+                    raise RuntimeError("no audio returned")
+            except Exception as exc:
+                counts["failed"] += 1
+                print(f"❌ Pre-warm {job['label']} failed: {exc.__class__.__name__}: {exc}")
+            else:
+                counts["built"] += 1
+
+    pending = []
+    for job in jobs:
+        state = store.status(job["slot"], job["key"], job["ext"])
+        counts[state] += 1
+        if state != "fresh":
+            pending.append(build(job))
+    await asyncio.gather(*pending)
+    print(f"🔥 Pre-warm: {counts['fresh']} fresh, {counts['missing']} missing, {counts['stale']} stale -> "
+          f"{counts['built']} built, {counts['failed']} failed")
+    return counts
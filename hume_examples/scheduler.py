@@ -0,0 +1,211 @@
+import time, heapq, asyncio, itertools
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+
+# ======================================================
+# 🚦 QUOTA / RATE-LIMIT AWARE REQUEST SCHEDULER
+# ======================================================
+# Sits in front of client.tts.synthesize_json_streaming (see ScheduledClient):
+#   - a token bucket denominated in *seconds of generated audio*, estimated
+#     from text length and the utterance speed, plus an optional hard quota,
+#   - AIMD concurrency: halve on 429/overload, +1 after a window of successes,
+#   - strict priority classes: interactive before default before background.
+PRIORITY_INTERACTIVE = 0
+PRIORITY_DEFAULT = 1
+PRIORITY_BACKGROUND = 2
+
+CHARS_PER_SECOND = 15
+OVERLOAD_STATUSES = {429, 503, 529}
+
+current_priority: ContextVar[int] = ContextVar("tts_priority", default=PRIORITY_DEFAULT)
+
+
+class QuotaExceededError(Exception):
+    pass
+
+
+@contextmanager
+def priority(level: int):
+    token = current_priority.set(level)
+    try:
+        yield
+    finally:
+        current_priority.reset(token)
+
+
+def estimate_audio_seconds(text: str, speed: float | None = None) -> float:
+    return len(text) / CHARS_PER_SECOND / (speed or 1.0)
+
+
+def is_overload(exc: BaseException) -> bool:
+    return getattr(exc, "status_code", None) in OVERLOAD_STATUSES
+
+
+class TokenBucket:
+    def __init__(self, rate: float = 0.0, burst: float = 120.0, quota: float | None = None):
+        # rate: audio seconds refilled per wall-clock second (0 = unlimited)
+        self.rate = rate
+        self.burst = burst
+        self.quota = quota
+        self.tokens = burst
+        self.used = 0.0
+        self.paused_until = 0.0
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        if self.rate > 0:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, cost: float) -> float:
+        now = time.monotonic()
+        self._refill(now)
+        if now < self.paused_until:
+            return self.paused_until - now
+        if self.rate <= 0:
+            return 0.0
+        needed = min(cost, self.burst)
+        return 0.0 if self.tokens >= needed else (needed - self.tokens) / self.rate
+
+    def take(self, cost: float) -> None:
+        if self.quota is not None and self.used + cost > self.quota:
+            raise QuotaExceededError(f"request needs ~{cost:.1f}s of audio, "
+                                     f"{max(0.0, self.quota - self.used):.1f}s left of the {self.quota:.0f}s quota")
+        if self.rate > 0:
+            self.tokens -= min(cost, self.burst)
+        self.used += cost
+
+    def refund(self, cost: float) -> None:
+        if self.rate > 0:
+            self.tokens = min(self.burst, self.tokens + min(cost, self.burst))
+        self.used = max(0.0, self.used - cost)
+
+    def pause(self, seconds: float) -> None:
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+
+class RequestScheduler:
+    def __init__(self, bucket: TokenBucket | None = None, max_concurrency: int = 4, min_concurrency: int = 1,
+                 overload_pause: float = 1.0):
+        self.bucket = bucket or TokenBucket()
+        self.max_concurrency = max(1, max_concurrency)
+        self.min_concurrency = max(1, min(min_concurrency, self.max_concurrency))
+        self.limit = self.max_concurrency
+        self.overload_pause = overload_pause
+        self.in_flight = 0
+        self.successes = 0
+        self.overloads = 0
+        self.completed = 0
+        self._waiters = []
+        self._order = itertools.count()
+        self._timer = None
+
+    async def acquire(self, cost: float, level: int | None = None) -> None:
+        level = current_priority.get() if level is None else level
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (level, next(self._order), cost, future))
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release()
+            raise
+
+    def _dispatch(self) -> None:
+        while self._waiters and self.in_flight < self.limit:
+            level, order, cost, future = self._waiters[0]
+            if future.cancelled():
+                heapq.heappop(self._waiters)
+                continue
+            delay = self.bucket.wait_time(cost)
+            if delay > 0:
+                self._schedule(delay)
+                return
+            heapq.heappop(self._waiters)
+            try:
+                self.bucket.take(cost)
+            except QuotaExceededError as exc:
+                future.set_exception(exc)
+                continue
+            self.in_flight += 1
+            future.set_result(None)
+
+    def _schedule(self, delay: float) -> None:
+        if self._timer is not None:
+            return
+
+        def fire():
+            self._timer = None
+            self._dispatch()
+
+        self._timer = asyncio.get_running_loop().call_later(delay, fire)
+
+    def release(self) -> None:
+        self.in_flight -= 1
+        self._dispatch()
+
+    def on_success(self) -> None:
+        self.completed += 1
+        self.successes += 1
+        if self.successes >= self.limit and self.limit < self.max_concurrency:
+            self.limit += 1
+            self.successes = 0
+
+    def on_overload(self, exc: BaseException) -> None:
+        self.overloads += 1
+        self.successes = 0
+        self.limit = max(self.min_concurrency, self.limit // 2)
+        retry_after = (getattr(exc, "headers", None) or {}).get("retry-after")
+        try:
+            pause = float(retry_after) if retry_after is not None else self.overload_pause
+        except ValueError:
+            pause = self.overload_pause
+        self.bucket.pause(pause)
+        print(f"🚦 Overloaded ({getattr(exc, 'status_code', '?')}): concurrency -> {self.limit}, pausing {pause:.1f}s")
+
+    def summary(self) -> str:
+        quota = f" of {self.bucket.quota:.0f}s quota" if self.bucket.quota is not None else ""
+        return (f"🚦 Scheduler: {self.completed} requests, ~{self.bucket.used:.1f}s audio{quota}, "
+                f"{self.overloads} overloads, concurrency limit {self.limit}/{self.max_concurrency}")
+
+
+# ======================================================
+# 🔌 DROP-IN CLIENT WRAPPER
+# ======================================================
+class _ScheduledTTS:
+    def __init__(self, tts, scheduler: RequestScheduler):
+        self._tts = tts
+        self._scheduler = scheduler
+
+    def __getattr__(self, name):
+        return getattr(self._tts, name)
+
+    async def synthesize_json_streaming(self, utterances, **kwargs):
+        scheduler = self._scheduler
+        cost = sum(estimate_audio_seconds(u.text, getattr(u, "speed", None)) for u in utterances)
+        await scheduler.acquire(cost)
+        try:
+            async for chunk in self._tts.synthesize_json_streaming(utterances=utterances, **kwargs):
+                yield chunk
+        except Exception as exc:
+            if is_overload(exc):
+                # Rejected requests produce no audio, so they do not count against the quota.
+                scheduler.bucket.refund(cost)
+                scheduler.on_overload(exc)
+            raise
+        else:
+            scheduler.on_success()
+        finally:
+            scheduler.release()
+
+
+class ScheduledClient:
+    def __init__(self, client, scheduler: RequestScheduler):
+        self._client = client
+        self.scheduler = scheduler
+        self.tts = _ScheduledTTS(client.tts, scheduler)
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
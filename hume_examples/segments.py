@@ -0,0 +1,157 @@
+import os, json, mmap, struct, binascii
+from pathlib import Path
+from contextlib import contextmanager
+
+from stitch import mp3_frames, mp3_frame_seconds, wav_layout
+
+
+# ======================================================
+# 🧭 SEGMENT INDEX SIDECAR FOR MULTI OUTPUTS
+# ======================================================
+# While a multi-utterance stream is consumed, every chunk's decoded size is
+# added to the byte range of the segment its utterance_index belongs to, so
+# no audio is buffered or re-read for offsets. When the file is closed the
+# ranges get their time span (MP3 frame headers, or the WAV/PCM byte rate)
+# and are saved next to the audio as <file>.idx.json:
+#   {"version": 1, "ext": "mp3", "bytes": ...,
+#    "segments": [{"offset", "length", "start", "end", "emotion"}, ...]}
+# Any one segment can then be sliced out of the file through mmap. The
+# sidecar is plain JSON about byte ranges, so it stays valid when the audio
+# is copied (e.g. out of the synthesis cache) as long as the size matches.
+INDEX_VERSION = 1
+PCM_BYTE_RATE = 48000 * 2  # raw pcm output: 48 kHz, 16-bit mono
+
+
+def decoded_size(audio_b64: str) -> int:
+    size = len(audio_b64)
+    if size % 4:
+        # Not canonical (embedded whitespace): decode to be exact.
+        return len(binascii.a2b_base64(audio_b64))
+    return size // 4 * 3 - audio_b64.endswith("==") - audio_b64.endswith("=")
+
+
+def index_path(audio_path: Path) -> Path:
+    audio_path = Path(audio_path)
+    return audio_path.with_name(audio_path.name + ".idx.json")
+
+
+class SegmentIndex:
+    def __init__(self, segment_of: list[int] | None = None):
+        # segment_of[utterance_index] -> segment number (default: one utterance per segment)
+        self.segment_of = segment_of
+        self.ranges: dict[int, list[int]] = {}
+        self.position = 0
+
+    def __call__(self, chunk) -> None:
+        index = getattr(chunk, "utterance_index", None) or 0
+        if self.segment_of is not None:
+            index = self.segment_of[min(index, len(self.segment_of) - 1)]
+        self.add(index, decoded_size(chunk.audio))
+
+    def add(self, index: int, size: int) -> None:
+        # The next `size` bytes of the file belong to segment `index`.
+        span = self.ranges.get(index)
+        if span is None:
+            self.ranges[index] = [self.position, size]
+        else:
+            # Segments arrive in order; a late chunk just extends its segment's range.
+            span[1] = self.position + size - span[0]
+        self.position += size
+
+    def _times(self, mm, ext: str, spans: list[tuple[int, int]]) -> list[float]:
+        durations = [0.0] * len(spans)
+        if ext == "mp3":
+            which = 0
+            for offset, length in mp3_frames(mm):
+                while which < len(spans) - 1 and offset >= spans[which][0] + spans[which][1]:
+                    which += 1
+                durations[which] += mp3_frame_seconds(mm[offset:offset + 4])
+        elif ext == "wav":
+            fmt, data_offset, _ = wav_layout(mm)
+            byte_rate = struct.unpack("<I", fmt[8:12])[0]
+            for i, (offset, length) in enumerate(spans):
+                durations[i] = max(0, offset + length - max(offset, data_offset)) / byte_rate
+        else:
+            durations = [length / PCM_BYTE_RATE for _, length in spans]
+        return durations
+
+    def finish(self, audio_path: Path, ext: str, emotions: list[str] | None = None) -> dict:
+        audio_path = Path(audio_path)
+        numbers = sorted(self.ranges)
+        spans = [tuple(self.ranges[n]) for n in numbers]
+        stat = audio_path.stat()
+        durations = [0.0] * len(spans)
+        if stat.st_size:
+            with open(audio_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                durations = self._times(mm, ext, spans)
+        segments = []
+        clock = 0.0
+        for number, (offset, length), seconds in zip(numbers, spans, durations):
+            entry = {"segment": number, "offset": offset, "length": length,
+                     "start": round(clock, 3), "end": round(clock + seconds, 3)}
+            if emotions is not None and number < len(emotions):
+                entry["emotion"] = emotions[number]
+            segments.append(entry)
+            clock += seconds
+        return save_index(audio_path, ext, segments)
+
+
+def save_index(audio_path: Path, ext: str, segments: list[dict]) -> dict:
+    audio_path = Path(audio_path)
+    index = {"version": INDEX_VERSION, "ext": ext, "bytes": audio_path.stat().st_size, "segments": segments}
+    tmp = index_path(audio_path).with_suffix(".part")
+    tmp.write_text(json.dumps(index, separators=(",", ":")), encoding="utf-8")
+    os.replace(tmp, index_path(audio_path))
+    return index
+
+
+def load_index(audio_path: Path) -> dict:
+    audio_path = Path(audio_path)
+    try:
+        index = json.loads(index_path(audio_path).read_text(encoding="utf-8"))
+    except (OSError, ValueError) as exc:
+        raise ValueError(f"{audio_path}: no usable segment index ({exc})") from exc
+    if index.get("version") != INDEX_VERSION or index.get("bytes") != audio_path.stat().st_size:
+        raise ValueError(f"{audio_path}: segment index is out of date, re-synthesize to rebuild it")
+    return index
+
+
+def _find(index: dict, segment: int) -> dict:
+    for entry in index["segments"]:
+        if entry["segment"] == segment:
+            return entry
+    raise KeyError(f"no segment {segment} (index has {len(index['segments'])})")
+
+
+@contextmanager
+def segment_view(audio_path: Path, segment: int, index: dict | None = None):
+    # Zero-copy memoryview of one segment's audio bytes. For WAV the view
+    # covers PCM data only; the file header is never part of it.
+    index = index or load_index(audio_path)
+    entry = _find(index, segment)
+    with open(audio_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        start, end = entry["offset"], entry["offset"] + entry["length"]
+        if index["ext"] == "wav":
+            start = max(start, wav_layout(mm)[1])
+        whole = memoryview(mm)
+        view = whole[start:end]
+        try:
+            yield view
+        finally:
+            view.release()
+            whole.release()
+
+
+def read_segment(audio_path: Path, segment: int, index: dict | None = None) -> bytes:
+    # One segment as a standalone playable file (a fresh header is added for WAV).
+    index = index or load_index(audio_path)
+    with segment_view(audio_path, segment, index) as view:
+        data = bytes(view)
+    if index["ext"] != "wav":
+        return data
+    with open(audio_path, "rb") as f:
+        fmt = wav_layout(f)[0]
+    pad = len(data) & 1
+    return (b"RIFF" + struct.pack("<I", 4 + 8 + len(fmt) + 8 + len(data) + pad) + b"WAVE"
+            + b"fmt " + struct.pack("<I", len(fmt)) + fmt
+            + b"data" + struct.pack("<I", len(data)) + data + b"\0" * pad)
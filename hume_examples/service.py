@@ -0,0 +1,206 @@
+import json, asyncio
+from pathlib import Path
+
+
+# ======================================================
+# 🛰️ LOCAL SYNTHESIS SERVICE WITH REQUEST COALESCING
+# ======================================================
+# A small HTTP/1.1 server (TCP or Unix socket, stdlib only) that keeps one
+# warm client for its whole lifetime. It speaks the routes the mobile app's
+# utils/api.js already calls:
+#   GET  /emotions           -> {"emotions": [...]}
+#   POST /synthesize         {text, emotion, voice?, ext?} -> audio
+#   POST /synthesize-multi   {segments: [{text, emotion}, ...], ext?} -> audio
+#   GET  /health             -> counters
+# Concurrent requests with the same cache key share one upstream stream:
+# the first becomes the producer, every other caller attaches to its
+# Broadcast and receives the bytes already sent plus everything after.
+CONTENT_TYPES = {"mp3": "audio/mpeg", "wav": "audio/wav", "pcm": "application/octet-stream"}
+MAX_BODY = 1024 * 1024
+
+
+class Broadcast:
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.chunks: list[bytes] = []
+        self.done = False
+        self.error: BaseException | None = None
+        self._event = asyncio.Event()
+
+    def _wake(self) -> None:
+        event, self._event = self._event, asyncio.Event()
+        event.set()
+
+    def _append(self, data: bytes) -> None:
+        self.chunks.append(data)
+        self._wake()
+
+    # Sink interface; called from the pipeline's writer thread, so the
+    # (reused) buffer is copied and handed over to the event loop.
+    def write(self, data) -> None:
+        self.loop.call_soon_threadsafe(self._append, bytes(data))
+
+    def finish(self, error: BaseException | None = None) -> None:
+        self.done = True
+        self.error = error
+        self._wake()
+
+    async def __aiter__(self):
+        index = 0
+        while True:
+            while index < len(self.chunks):
+                yield self.chunks[index]
+                index += 1
+            if self.done:
+                if self.error is not None:
+                    raise self.error
+                return
+            await self._event.wait()
+
+
+class SynthesisService:
+    def __init__(self, plan, render, emotions, cache=None, shortcuts=None):
+        # plan(path, payload) -> (key, job, ext); raises KeyError/ValueError on bad input
+        # render(job, ext, sink) -> bytes written; job is whatever plan returned for the request
+        # shortcuts: optional pre-warmed ShortcutStore, checked before the cache
+        self.plan = plan
+        self.render = render
+        self.emotions = emotions
+        self.cache = cache
+        self.shortcuts = shortcuts
+        # key -> (broadcast, producer task); the task reference keeps it from being garbage collected
+        self.inflight: dict[str, tuple[Broadcast, asyncio.Task]] = {}
+        self.stats = {"requests": 0, "upstream": 0, "coalesced": 0, "shortcut_hits": 0, "cache_hits": 0, "errors": 0}
+
+    async def _produce(self, key: str, job, ext: str, broadcast: Broadcast) -> None:
+        self.stats["upstream"] += 1
+        try:
+            if self.cache is None:
+                await self.render(job, ext, broadcast)
+            else:
+                from sinks import StreamSink, TeeSink
+                with self.cache.store(key, ext) as f:
+                    await self.render(job, ext, TeeSink(broadcast, StreamSink(f)))
+            broadcast.finish()
+        except BaseException as exc:
+            self.stats["errors"] += 1
+            broadcast.finish(exc)
+            if not isinstance(exc, Exception):
+                raise
+        finally:
+            self.inflight.pop(key, None)
+
+    def open_stream(self, key: str, job, ext: str):
+        warmed = self.shortcuts.lookup(key, ext) if self.shortcuts is not None else None
+        if warmed is not None:
+            self.stats["shortcut_hits"] += 1
+            return warmed
+        cached = self.cache.lookup(key, ext) if self.cache is not None else None
+        if cached is not None:
+            self.stats["cache_hits"] += 1
+            return cached
+        entry = self.inflight.get(key)
+        if entry is None:
+            broadcast = Broadcast(asyncio.get_running_loop())
+            self.inflight[key] = (broadcast, asyncio.ensure_future(self._produce(key, job, ext, broadcast)))
+            return broadcast
+        self.stats["coalesced"] += 1
+        return entry[0]
+
+    # ------------------------------------------------------
+    # HTTP plumbing
+    # ------------------------------------------------------
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            method, path, payload = await self._read_request(reader)
+            self.stats["requests"] += 1
+            if method == "GET" and path == "/emotions":
+                await self._json(writer, 200, {"emotions": list(self.emotions())})
+            elif method == "GET" and path == "/health":
+                await self._json(writer, 200, {**self.stats, "inflight": len(self.inflight)})
+            elif method == "POST" and path in ("/synthesize", "/synthesize-multi"):
+                try:
+                    key, job, ext = self.plan(path, payload)
+                except (KeyError, ValueError, TypeError) as exc:
+                    await self._json(writer, 400, {"error": str(exc.args[0]) if exc.args else str(exc)})
+                else:
+                    await self._stream_audio(writer, self.open_stream(key, job, ext), ext)
+            else:
+                await self._json(writer, 404, {"error": f"no route for {method} {path}"})
+        except (ValueError, asyncio.IncompleteReadError) as exc:
+            await self._json(writer, 400, {"error": str(exc) or "malformed request"})
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def _read_request(self, reader: asyncio.StreamReader):
+        request_line = (await reader.readline()).decode("latin-1").strip()
+        if not request_line:
+            raise ValueError("empty request")
+        method, target, _ = request_line.split(" ", 2)
+        headers = {}
+        while True:
+            line = (await reader.readline()).decode("latin-1").strip()
+            if not line:
+                break
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+        length = int(headers.get("content-length", 0))
+        if length > MAX_BODY:
+            raise ValueError("request body too large")
+        body = await reader.readexactly(length) if length else b""
+        payload = json.loads(body) if body else {}
+        return method.upper(), target.split("?", 1)[0], payload
+
+    async def _json(self, writer: asyncio.StreamWriter, status: int, body: dict) -> None:
+        data = json.dumps(body).encode("utf-8")
+        writer.write(self._head(status, "application/json", len(data)) + data)
+        await writer.drain()
+
+    @staticmethod
+    def _head(status: int, content_type: str, length: int | None = None) -> bytes:
+        reason = {200: "OK", 400: "Bad Request", 404: "Not Found", 502: "Bad Gateway"}.get(status, "OK")
+        lines = [f"HTTP/1.1 {status} {reason}", f"Content-Type: {content_type}", "Connection: close"]
+        lines.append(f"Content-Length: {length}" if length is not None else "Transfer-Encoding: chunked")
+        return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+    async def _stream_audio(self, writer: asyncio.StreamWriter, source, ext: str) -> None:
+        content_type = CONTENT_TYPES.get(ext, "application/octet-stream")
+        if isinstance(source, Path):
+            data = await asyncio.to_thread(source.read_bytes)  # cache/shortcut file, off the loop
+            writer.write(self._head(200, content_type, len(data)) + data)
+            await writer.drain()
+            return
+        started = False
+        try:
+            async for data in source:
+                if not started:
+                    writer.write(self._head(200, content_type))
+                    started = True
+                writer.write(b"%x\r\n%s\r\n" % (len(data), data))
+                await writer.drain()
+        except Exception as exc:
+            if not started:
+                await self._json(writer, 502, {"error": f"{exc.__class__.__name__}: {exc}"})
+            return  # mid-stream failure: closing without the last chunk tells the client
+        if not started:
+            writer.write(self._head(200, content_type, 0))
+        else:
+            writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+
+async def serve(service: SynthesisService, host: str = "127.0.0.1", port: int = 5000, unix: str | None = None):
+    if unix:
+        server = await asyncio.start_unix_server(service.handle, path=unix)
+        print(f"🛰️ Serving on unix:{unix}")
+    else:
+        server = await asyncio.start_server(service.handle, host, port)
+        print(f"🛰️ Serving on http://{host}:{port}")
+    async with server:
+        await server.serve_forever()
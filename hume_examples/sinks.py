@@ -0,0 +1,163 @@
+import io, sys, time, asyncio, binascii
+from concurrent.futures import ThreadPoolExecutor
+
+
+# ======================================================
+# 🚰 AUDIO SINKS
+# ======================================================
+# Wraps an already-open binary file object: a file, a pipe, sys.stdout.buffer...
+class StreamSink:
+    def __init__(self, fileobj, close: bool = False):
+        self.fileobj = fileobj
+        self._close = close
+        self.written = 0
+
+    def write(self, data) -> None:
+        self.fileobj.write(data)
+        self.written += len(data)
+
+    def flush(self) -> None:
+        self.fileobj.flush()
+
+    def close(self) -> None:
+        self.fileobj.flush()
+        if self._close:
+            self.fileobj.close()
+
+
+class FileSink(StreamSink):
+    def __init__(self, path):
+        super().__init__(open(path, "wb"), close=True)
+
+
+class MemorySink(StreamSink):
+    def __init__(self):
+        super().__init__(io.BytesIO())
+
+    def getvalue(self) -> bytes:
+        return self.fileobj.getvalue()
+
+
+def stdout_sink() -> StreamSink:
+    return StreamSink(sys.stdout.buffer)
+
+
+# Every write goes to all sinks, e.g. the synthesis cache and the output file.
+class TeeSink:
+    def __init__(self, *sinks):
+        self.sinks = sinks
+
+    def write(self, data) -> None:
+        for sink in self.sinks:
+            sink.write(data)
+
+    def flush(self) -> None:
+        for sink in self.sinks:
+            flush = getattr(sink, "flush", None)
+            if flush is not None:
+                flush()
+
+
+# ======================================================
+# 🧵 READER → BOUNDED QUEUE → WRITER THREAD
+# ======================================================
+# The network reader only enqueues the base64 payloads; once `queue_size`
+# chunks are waiting it blocks, which stops pulling from the HTTP stream.
+# The writer drains whatever is queued, decodes it into a reusable staging
+# buffer and hands block-sized writes to a single dedicated thread, so chunk
+# order is the arrival order and the event loop never touches the disk.
+class StreamPipeline:
+    def __init__(self, sink, queue_size: int = 8, buffer_size: int = 256 * 1024, on_chunk=None, record=None):
+        self.sink = sink
+        self.on_chunk = on_chunk
+        self.record = record
+        self.queue_size = queue_size
+        self.buffer = bytearray(buffer_size)
+        self.chunks = 0
+        self.written = 0
+
+    def _decode_and_write(self, batch: list) -> None:
+        record = self.record
+        clock = time.perf_counter
+        decode_seconds = 0.0
+        started = clock() if record is not None else 0.0
+        view = memoryview(self.buffer)
+        pos = 0
+        for audio_b64 in batch:
+            if record is not None:
+                t0 = clock()
+                data = binascii.a2b_base64(audio_b64)
+                decode_seconds += clock() - t0
+            else:
+                data = binascii.a2b_base64(audio_b64)
+            size = len(data)
+            if pos + size > len(self.buffer):
+                if pos:
+                    self._emit(view[:pos])
+                    pos = 0
+                if size > len(self.buffer):
+                    self._emit(data)
+                    continue
+            view[pos:pos + size] = data
+            pos += size
+        if pos:
+            self._emit(view[:pos])
+        view.release()
+        # Push each batch through so pipes/stdout see audio as soon as it lands.
+        flush = getattr(self.sink, "flush", None)
+        if flush is not None:
+            flush()
+        if record is not None:
+            record.decode_seconds += decode_seconds
+            record.write_seconds += clock() - started - decode_seconds
+
+    def _emit(self, data) -> None:
+        # Bytes are counted as they reach the sink, so a stream that fails
+        # midway still reports what it wrote.
+        self.sink.write(data)
+        self.written += len(data)
+        if self.record is not None:
+            self.record.bytes += len(data)
+
+    async def _read(self, stream, queue: asyncio.Queue) -> None:
+        async for chunk in stream:
+            audio_b64 = getattr(chunk, "audio", None)
+            if audio_b64:
+                if self.on_chunk is not None:
+                    self.on_chunk(chunk)
+                if self.record is not None:
+                    self.record.on_chunk()
+                self.chunks += 1
+                await queue.put(audio_b64)
+        await queue.put(None)
+
+    async def _write(self, queue: asyncio.Queue, executor: ThreadPoolExecutor) -> None:
+        loop = asyncio.get_running_loop()
+        done = False
+        while not done:
+            batch = [await queue.get()]
+            while not queue.empty():
+                batch.append(queue.get_nowait())
+            if batch[-1] is None:
+                batch.pop()
+                done = True
+            if batch:
+                await loop.run_in_executor(executor, self._decode_and_write, batch)
+
+    async def run(self, stream) -> int:
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="tts-writer") as executor:
+            reader = asyncio.ensure_future(self._read(stream, queue))
+            writer = asyncio.ensure_future(self._write(queue, executor))
+            try:
+                await asyncio.gather(reader, writer)
+            except BaseException:
+                reader.cancel()
+                writer.cancel()
+                await asyncio.gather(reader, writer, return_exceptions=True)
+                raise
+        return self.written
+
+
+async def pump(stream, sink, queue_size: int = 8, on_chunk=None, record=None) -> int:
+    return await StreamPipeline(sink, queue_size, on_chunk=on_chunk, record=record).run(stream)
@@ -0,0 +1,171 @@
+import shutil, struct
+from pathlib import Path
+
+
+# ======================================================
+# 🧷 ORDERED STITCHING OF PER-SEGMENT OUTPUTS
+# ======================================================
+MP3_BITRATES = {
+    # (mpeg1, layer) -> kbps by index
+    (True, 1): [0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448],
+    (True, 2): [0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384],
+    (True, 3): [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    (False, 1): [0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256],
+    (False, 2): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+    (False, 3): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+MP3_SAMPLE_RATES = {3: [44100, 48000, 32000], 2: [22050, 24000, 16000], 0: [11025, 12000, 8000]}
+COPY_BLOCK = 256 * 1024
+
+
+def mp3_frame_length(header: bytes) -> int:
+    if len(header) < 4 or header[0] != 0xFF or header[1] & 0xE0 != 0xE0:
+        return 0
+    version = (header[1] >> 3) & 0x03
+    layer = 4 - ((header[1] >> 1) & 0x03)
+    bitrate_index = header[2] >> 4
+    rate_index = (header[2] >> 2) & 0x03
+    if version == 1 or layer == 4 or bitrate_index in (0, 15) or rate_index == 3:
+        return 0
+    mpeg1 = version == 3
+    bitrate = MP3_BITRATES[(mpeg1, layer)][bitrate_index] * 1000
+    sample_rate = MP3_SAMPLE_RATES[version][rate_index]
+    padding = (header[2] >> 1) & 0x01
+    if layer == 1:
+        return (12 * bitrate // sample_rate + padding) * 4
+    if layer == 3 and not mpeg1:
+        return 72 * bitrate // sample_rate + padding
+    return 144 * bitrate // sample_rate + padding
+
+
+def mp3_frame_seconds(header: bytes) -> float:
+    # Playback time of one frame; call only on headers mp3_frame_length accepted.
+    version = (header[1] >> 3) & 0x03
+    layer = 4 - ((header[1] >> 1) & 0x03)
+    sample_rate = MP3_SAMPLE_RATES[version][(header[2] >> 2) & 0x03]
+    samples = 384 if layer == 1 else 576 if layer == 3 and version != 3 else 1152
+    return samples / sample_rate
+
+
+def mp3_frames(data: bytes):
+    # Yields (offset, length) of every MPEG audio frame, skipping an ID3v2
+    # tag, a trailing ID3v1 tag, stray bytes and the Xing/Info/VBRI frame
+    # (its frame count would only describe the first segment).
+    pos = 0
+    end = len(data)
+    if data[:3] == b"ID3" and len(data) >= 10:
+        size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+        pos = 10 + size + (10 if data[5] & 0x10 else 0)
+    if end - pos >= 128 and data[end - 128:end - 125] == b"TAG":
+        end -= 128
+    first = True
+    while pos + 4 <= end:
+        length = mp3_frame_length(data[pos:pos + 4])
+        if length == 0 or pos + length > end:
+            pos += 1
+            continue
+        if first and any(tag in data[pos:pos + 64] for tag in (b"Xing", b"Info", b"VBRI")):
+            first = False
+            pos += length
+            continue
+        first = False
+        yield pos, length
+        pos += length
+
+
+def stitch_mp3(parts: list[Path], out_path: Path, sizes: list[int] | None = None) -> int:
+    written = 0
+    with open(out_path, "wb") as out:
+        for part in parts:
+            data = Path(part).read_bytes()
+            before = written
+            for offset, length in mp3_frames(data):
+                out.write(data[offset:offset + length])
+                written += length
+            if sizes is not None:
+                sizes.append(written - before)
+    return written
+
+
+def wav_layout(f) -> tuple[bytes, int, int]:
+    # Returns (fmt chunk payload, data offset, data length). Streamed WAVs
+    # carry a placeholder data size, in which case the data runs to EOF.
+    f.seek(0, 2)
+    file_size = f.tell()
+    f.seek(0)
+    riff = f.read(12)
+    if riff[:4] != b"RIFF" or riff[8:12] != b"WAVE":
+        raise ValueError("not a RIFF/WAVE file")
+    fmt = None
+    while True:
+        header = f.read(8)
+        if len(header) < 8:
+            raise ValueError("WAV file has no data chunk")
+        chunk_id, size = header[:4], struct.unpack("<I", header[4:])[0]
+        if chunk_id == b"fmt ":
+            fmt = f.read(size + (size & 1))[:size]
+        elif chunk_id == b"data":
+            if fmt is None:
+                raise ValueError("WAV data chunk before fmt chunk")
+            offset = f.tell()
+            return fmt, offset, min(size, file_size - offset)
+        else:
+            f.seek(size + (size & 1), 1)
+
+
+def stitch_wav(parts: list[Path], out_path: Path, sizes: list[int] | None = None) -> int:
+    layouts = []
+    for part in parts:
+        with open(part, "rb") as f:
+            layouts.append(wav_layout(f))
+    if not layouts:
+        raise ValueError("nothing to stitch")
+    fmt = layouts[0][0]
+    for part, (part_fmt, _, _) in zip(parts, layouts):
+        if part_fmt[:16] != fmt[:16]:
+            raise ValueError(f"{part} does not share the audio format of the first segment")
+
+    total = sum(length for _, _, length in layouts)
+    pad = total & 1
+    header = b"RIFF" + struct.pack("<I", 4 + 8 + len(fmt) + 8 + total + pad) + b"WAVE" \
+        + b"fmt " + struct.pack("<I", len(fmt)) + fmt + b"data" + struct.pack("<I", total)
+    if sizes is not None:
+        sizes.extend(length for _, _, length in layouts)
+        if sizes:
+            sizes[0] += len(header)
+    with open(out_path, "wb") as out:
+        out.write(header)
+        for part, (_, offset, length) in zip(parts, layouts):
+            with open(part, "rb") as f:
+                f.seek(offset)
+                remaining = length
+                while remaining:
+                    block = f.read(min(COPY_BLOCK, remaining))
+                    if not block:
+                        raise ValueError(f"{part} is shorter than its WAV header claims")
+                    out.write(block)
+                    remaining -= len(block)
+        if pad:
+            out.write(b"\0")
+    return total
+
+
+def stitch(parts: list[Path], out_path: Path, ext: str, sizes: list[int] | None = None) -> int:
+    # sizes, if given, receives the bytes each part occupies in out_path in
+    # order (the first part's range includes the file header), which is
+    # what a segment index needs.
+    if ext == "wav":
+        return stitch_wav(parts, out_path, sizes)
+    if ext == "mp3":
+        return stitch_mp3(parts, out_path, sizes)
+    # Unknown container: plain byte concatenation is the best we can do.
+    written = 0
+    with open(out_path, "wb") as out:
+        for part in parts:
+            with open(part, "rb") as f:
+                shutil.copyfileobj(f, out, COPY_BLOCK)
+            size = Path(part).stat().st_size
+            written += size
+            if sizes is not None:
+                sizes.append(size)
+    return written
@@ -0,0 +1,123 @@
+import struct, asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from emojis import EmojiTokenizer
+from fake_client import MP3_FRAME_SIZE, FakeApiError, FakeHumeClient, fake_mp3, fake_pcm, wav_header
+from presets import load_registry
+from scheduler import RequestScheduler, ScheduledClient, TokenBucket
+from stitch import mp3_frames, stitch, wav_layout
+
+
+# ======================================================
+# 🧪 OFFLINE TESTS (NO API KEY, NO NETWORK)
+# ======================================================
+# Run from hume_examples/:  python -m pytest -q
+@pytest.fixture(scope="module")
+def tokenizer():
+    return EmojiTokenizer.from_registry(load_registry())
+
+
+def test_emoji_run_length_picks_level(tokenizer):
+    assert tokenizer("😡 mad") == [{"text": "mad", "emotion": "angry"}]
+    assert tokenizer("😡😡 mad") == [{"text": "mad", "emotion": "angry_2"}]
+    assert tokenizer("😡😡😡 mad") == [{"text": "mad", "emotion": "angry_3"}]
+
+
+def test_emoji_level_is_capped(tokenizer):
+    assert tokenizer("😡😡😡😡😡 mad") == [{"text": "mad", "emotion": "angry_3"}]
+    assert tokenizer("🙈🙈🙈 shy") == [{"text": "shy", "emotion": "shy"}]
+
+
+def test_emoji_zwj_sequence(tokenizer):
+    assert tokenizer("Hi 👩‍🎓 there", emotion="sad") == [
+        {"text": "Hi", "emotion": "sad"},
+        {"text": "there", "emotion": "neutral"},
+    ]
+    # A lone prefix of the sequence is not in the table and stays plain text.
+    assert tokenizer("👩 hi", emotion="sad") == [{"text": "👩 hi", "emotion": "sad"}]
+
+
+def test_emoji_modifiers_are_ignored(tokenizer):
+    skin_tone = tokenizer("Hi 👩🏽‍🎓 there", emotion="sad")
+    assert skin_tone == [{"text": "Hi", "emotion": "sad"}, {"text": "there", "emotion": "neutral"}]
+    assert tokenizer("😡️😡️ mad") == [{"text": "mad", "emotion": "angry_2"}]
+
+
+def test_emoji_switches_mid_text(tokenizer):
+    assert tokenizer("Calm start. 😡😡 Now mad! 😢 So sad. 😢 Still sad.") == [
+        {"text": "Calm start.", "emotion": "neutral"},
+        {"text": "Now mad!", "emotion": "angry_2"},
+        {"text": "So sad. Still sad.", "emotion": "sad"},
+    ]
+
+
+def test_emoji_only_or_empty_text(tokenizer):
+    assert tokenizer("😡😡 🥳") == []
+    assert tokenizer("   ") == []
+    assert tokenizer("plain text") == [{"text": "plain text", "emotion": "neutral"}]
+
+
+def test_stitch_mp3_keeps_only_frames(tmp_path):
+    clips = [fake_mp3(1.0, b"a"), fake_mp3(0.5, b"b")]
+    id3 = b"ID3\x04\x00\x00\x00\x00\x00\x05" + b"\x00" * 5
+    parts = []
+    for i, data in enumerate([id3 + clips[0], clips[1] + b"\x00\x01"]):
+        parts.append(tmp_path / f"part{i}.mp3")
+        parts[-1].write_bytes(data)
+    out = tmp_path / "out.mp3"
+    sizes = []
+    written = stitch(parts, out, "mp3", sizes)
+    data = out.read_bytes()
+    assert data == clips[0] + clips[1]
+    assert written == len(data) == sum(sizes)
+    assert sizes == [len(clips[0]), len(clips[1])]
+    assert len(list(mp3_frames(data))) == len(data) // MP3_FRAME_SIZE
+
+
+def test_stitch_wav_rewrites_header(tmp_path):
+    pcm = [fake_pcm(0.5, b"ab"), fake_pcm(0.25, b"cd")]
+    parts = [tmp_path / "streamed.wav", tmp_path / "exact.wav"]
+    parts[0].write_bytes(wav_header() + pcm[0])  # streamed: placeholder sizes
+    parts[1].write_bytes(wav_header(len(pcm[1])) + pcm[1])
+    out = tmp_path / "out.wav"
+    sizes = []
+    total = stitch(parts, out, "wav", sizes)
+    data = out.read_bytes()
+    assert total == len(pcm[0]) + len(pcm[1])
+    assert struct.unpack("<I", data[4:8])[0] == len(data) - 8
+    with open(out, "rb") as f:
+        _, offset, length = wav_layout(f)
+    assert length == total and data[offset:] == pcm[0] + pcm[1]
+    # The first part's range includes the header.
+    assert sizes == [offset + len(pcm[0]), len(pcm[1])]
+
+
+def test_scheduler_backs_off_to_server_stream_limit():
+    # Six requests at once against a fake server that allows two streams:
+    # the 429s halve the scheduler's concurrency and every request still
+    # completes once retried.
+    fake = FakeHumeClient(latency=0.001, seconds_per_char=0.0, max_streams=2)
+    scheduler = RequestScheduler(TokenBucket(), max_concurrency=6, overload_pause=0.01)
+    client = ScheduledClient(fake, scheduler)
+    utterance = SimpleNamespace(text="Hello there.", description="calm", speed=None, trailing_silence=None)
+
+    async def request() -> int:
+        for _ in range(20):
+            try:
+                return sum([len(chunk.audio) async for chunk in client.tts.synthesize_json_streaming([utterance])])
+            except FakeApiError as exc:
+                assert exc.status_code == 429
+        raise AssertionError("never got through")
+
+    async def run():
+        return await asyncio.gather(*(request() for _ in range(6)))
+
+    sizes = asyncio.run(run())
+    assert all(size > 0 for size in sizes)
+    assert fake.tts.max_in_flight <= 2
+    assert fake.tts.rate_limited == scheduler.overloads > 0
+    assert scheduler.completed == 6
+    assert scheduler.limit < scheduler.max_concurrency
+    assert scheduler.in_flight == 0